@@ -0,0 +1,349 @@
+"""
+ISO 3166-1 country gazetteer.
+
+Country names, common aliases and demonyms are compiled into a token trie at
+import time, so a piece of OCR text is matched against every country in a
+single left-to-right pass (longest match wins, so "PAPUA NEW GUINEA" beats
+"GUINEA"). Codes (alpha-2, alpha-3 and ICAO MRZ codes) are exact lookups.
+"""
+import re
+import unicodedata
+from collections import namedtuple
+
+Country = namedtuple("Country", ["alpha2", "alpha3", "name"])
+
+# alpha-2 | alpha-3 | name | aliases (;-separated) | demonyms (;-separated)
+_COUNTRY_TABLE = """
+AF|AFG|AFGHANISTAN||AFGHAN
+AX|ALA|ALAND ISLANDS|ALAND|
+AL|ALB|ALBANIA||ALBANIAN
+DZ|DZA|ALGERIA||ALGERIAN
+AS|ASM|AMERICAN SAMOA||AMERICAN SAMOAN
+AD|AND|ANDORRA||ANDORRAN
+AO|AGO|ANGOLA||ANGOLAN
+AI|AIA|ANGUILLA||ANGUILLAN
+AQ|ATA|ANTARCTICA||
+AG|ATG|ANTIGUA AND BARBUDA|ANTIGUA|ANTIGUAN;BARBUDAN
+AR|ARG|ARGENTINA||ARGENTINE;ARGENTINIAN
+AM|ARM|ARMENIA||ARMENIAN
+AW|ABW|ARUBA||ARUBAN
+AU|AUS|AUSTRALIA||AUSTRALIAN
+AT|AUT|AUSTRIA||AUSTRIAN
+AZ|AZE|AZERBAIJAN||AZERBAIJANI;AZERI
+BS|BHS|BAHAMAS|THE BAHAMAS|BAHAMIAN
+BH|BHR|BAHRAIN||BAHRAINI
+BD|BGD|BANGLADESH||BANGLADESHI
+BB|BRB|BARBADOS||BARBADIAN;BAJAN
+BY|BLR|BELARUS|BYELORUSSIA|BELARUSIAN
+BE|BEL|BELGIUM||BELGIAN
+BZ|BLZ|BELIZE||BELIZEAN
+BJ|BEN|BENIN||BENINESE
+BM|BMU|BERMUDA||BERMUDIAN
+BT|BTN|BHUTAN||BHUTANESE
+BO|BOL|BOLIVIA|PLURINATIONAL STATE OF BOLIVIA|BOLIVIAN
+BQ|BES|BONAIRE, SINT EUSTATIUS AND SABA|CARIBBEAN NETHERLANDS;BONAIRE|
+BA|BIH|BOSNIA AND HERZEGOVINA|BOSNIA|BOSNIAN;HERZEGOVINIAN
+BW|BWA|BOTSWANA||MOTSWANA;BATSWANA;BOTSWANAN
+BV|BVT|BOUVET ISLAND||
+BR|BRA|BRAZIL|BRASIL|BRAZILIAN
+IO|IOT|BRITISH INDIAN OCEAN TERRITORY||
+BN|BRN|BRUNEI DARUSSALAM|BRUNEI|BRUNEIAN
+BG|BGR|BULGARIA||BULGARIAN
+BF|BFA|BURKINA FASO||BURKINABE
+BI|BDI|BURUNDI||BURUNDIAN
+CV|CPV|CABO VERDE|CAPE VERDE|CAPE VERDEAN;CABO VERDEAN
+KH|KHM|CAMBODIA|KAMPUCHEA|CAMBODIAN;KHMER
+CM|CMR|CAMEROON||CAMEROONIAN
+CA|CAN|CANADA||CANADIAN
+KY|CYM|CAYMAN ISLANDS||CAYMANIAN
+CF|CAF|CENTRAL AFRICAN REPUBLIC||CENTRAL AFRICAN
+TD|TCD|CHAD||CHADIAN
+CL|CHL|CHILE||CHILEAN
+CN|CHN|CHINA|PEOPLE'S REPUBLIC OF CHINA;PRC;MAINLAND CHINA|CHINESE
+CX|CXR|CHRISTMAS ISLAND||
+CC|CCK|COCOS (KEELING) ISLANDS|COCOS ISLANDS;KEELING ISLANDS|
+CO|COL|COLOMBIA||COLOMBIAN
+KM|COM|COMOROS||COMORAN;COMORIAN
+CG|COG|CONGO|REPUBLIC OF THE CONGO;CONGO-BRAZZAVILLE|CONGOLESE
+CD|COD|DEMOCRATIC REPUBLIC OF THE CONGO|DR CONGO;DRC;CONGO-KINSHASA;ZAIRE|
+CK|COK|COOK ISLANDS||COOK ISLANDER
+CR|CRI|COSTA RICA||COSTA RICAN
+CI|CIV|COTE D'IVOIRE|IVORY COAST|IVORIAN
+HR|HRV|CROATIA|HRVATSKA|CROATIAN
+CU|CUB|CUBA||CUBAN
+CW|CUW|CURACAO||CURACAOAN
+CY|CYP|CYPRUS||CYPRIOT
+CZ|CZE|CZECHIA|CZECH REPUBLIC|CZECH
+DK|DNK|DENMARK||DANISH
+DJ|DJI|DJIBOUTI||DJIBOUTIAN
+DM|DMA|DOMINICA||
+DO|DOM|DOMINICAN REPUBLIC||DOMINICAN
+EC|ECU|ECUADOR||ECUADORIAN
+EG|EGY|EGYPT||EGYPTIAN
+SV|SLV|EL SALVADOR||SALVADORAN;SALVADORIAN
+GQ|GNQ|EQUATORIAL GUINEA||EQUATOGUINEAN;EQUATORIAL GUINEAN
+ER|ERI|ERITREA||ERITREAN
+EE|EST|ESTONIA||ESTONIAN
+SZ|SWZ|ESWATINI|SWAZILAND|SWAZI
+ET|ETH|ETHIOPIA||ETHIOPIAN
+FK|FLK|FALKLAND ISLANDS|MALVINAS|FALKLAND ISLANDER
+FO|FRO|FAROE ISLANDS|FAEROE ISLANDS|FAROESE
+FJ|FJI|FIJI||FIJIAN
+FI|FIN|FINLAND||FINNISH
+FR|FRA|FRANCE||FRENCH
+GF|GUF|FRENCH GUIANA||FRENCH GUIANESE
+PF|PYF|FRENCH POLYNESIA||FRENCH POLYNESIAN
+TF|ATF|FRENCH SOUTHERN TERRITORIES||
+GA|GAB|GABON||GABONESE
+GM|GMB|GAMBIA|THE GAMBIA|GAMBIAN
+GE|GEO|GEORGIA||GEORGIAN
+DE|DEU|GERMANY|DEUTSCHLAND|GERMAN
+GH|GHA|GHANA||GHANAIAN
+GI|GIB|GIBRALTAR||GIBRALTARIAN
+GR|GRC|GREECE|HELLAS;HELLENIC REPUBLIC|GREEK;HELLENIC
+GL|GRL|GREENLAND||GREENLANDIC
+GD|GRD|GRENADA||GRENADIAN
+GP|GLP|GUADELOUPE||
+GU|GUM|GUAM||GUAMANIAN
+GT|GTM|GUATEMALA||GUATEMALAN
+GG|GGY|GUERNSEY||
+GN|GIN|GUINEA||GUINEAN
+GW|GNB|GUINEA-BISSAU||BISSAU-GUINEAN
+GY|GUY|GUYANA||GUYANESE
+HT|HTI|HAITI||HAITIAN
+HM|HMD|HEARD ISLAND AND MCDONALD ISLANDS||
+VA|VAT|HOLY SEE|VATICAN CITY;VATICAN|
+HN|HND|HONDURAS||HONDURAN
+HK|HKG|HONG KONG|HONG KONG SAR;HKSAR|HONGKONGER;HONG KONGER;HONGKONGESE
+HU|HUN|HUNGARY||HUNGARIAN
+IS|ISL|ICELAND||ICELANDIC;ICELANDER
+IN|IND|INDIA|BHARAT|INDIAN
+ID|IDN|INDONESIA||INDONESIAN
+IR|IRN|IRAN|ISLAMIC REPUBLIC OF IRAN;PERSIA|IRANIAN;PERSIAN
+IQ|IRQ|IRAQ||IRAQI
+IE|IRL|IRELAND|EIRE;REPUBLIC OF IRELAND|IRISH
+IM|IMN|ISLE OF MAN||MANX
+IL|ISR|ISRAEL||ISRAELI
+IT|ITA|ITALY|ITALIA|ITALIAN
+JM|JAM|JAMAICA||JAMAICAN
+JP|JPN|JAPAN|NIPPON|JAPANESE
+JE|JEY|JERSEY||
+JO|JOR|JORDAN||JORDANIAN
+KZ|KAZ|KAZAKHSTAN||KAZAKH;KAZAKHSTANI
+KE|KEN|KENYA||KENYAN
+KI|KIR|KIRIBATI||I-KIRIBATI
+KP|PRK|NORTH KOREA|DEMOCRATIC PEOPLE'S REPUBLIC OF KOREA;DPRK;KOREA DPR|NORTH KOREAN
+KR|KOR|SOUTH KOREA|REPUBLIC OF KOREA;KOREA;KOREA REPUBLIC|SOUTH KOREAN;KOREAN
+KW|KWT|KUWAIT||KUWAITI
+KG|KGZ|KYRGYZSTAN|KYRGYZ REPUBLIC;KIRGHIZIA|KYRGYZ;KYRGYZSTANI
+LA|LAO|LAOS|LAO PEOPLE'S DEMOCRATIC REPUBLIC;LAO PDR|LAO;LAOTIAN
+LV|LVA|LATVIA||LATVIAN
+LB|LBN|LEBANON||LEBANESE
+LS|LSO|LESOTHO||BASOTHO;MOSOTHO
+LR|LBR|LIBERIA||LIBERIAN
+LY|LBY|LIBYA||LIBYAN
+LI|LIE|LIECHTENSTEIN||LIECHTENSTEINER
+LT|LTU|LITHUANIA||LITHUANIAN
+LU|LUX|LUXEMBOURG||LUXEMBOURGER;LUXEMBOURGISH
+MO|MAC|MACAO|MACAU;MACAO SAR|MACANESE
+MG|MDG|MADAGASCAR||MALAGASY
+MW|MWI|MALAWI||MALAWIAN
+MY|MYS|MALAYSIA||MALAYSIAN
+MV|MDV|MALDIVES||MALDIVIAN
+ML|MLI|MALI||MALIAN
+MT|MLT|MALTA||MALTESE
+MH|MHL|MARSHALL ISLANDS||MARSHALLESE
+MQ|MTQ|MARTINIQUE||MARTINIQUAIS
+MR|MRT|MAURITANIA||MAURITANIAN
+MU|MUS|MAURITIUS||MAURITIAN
+YT|MYT|MAYOTTE||MAHORAN
+MX|MEX|MEXICO||MEXICAN
+FM|FSM|MICRONESIA|FEDERATED STATES OF MICRONESIA|MICRONESIAN
+MD|MDA|MOLDOVA|REPUBLIC OF MOLDOVA|MOLDOVAN
+MC|MCO|MONACO||MONEGASQUE;MONACAN
+MN|MNG|MONGOLIA||MONGOLIAN
+ME|MNE|MONTENEGRO||MONTENEGRIN
+MS|MSR|MONTSERRAT||MONTSERRATIAN
+MA|MAR|MOROCCO||MOROCCAN
+MZ|MOZ|MOZAMBIQUE||MOZAMBICAN
+MM|MMR|MYANMAR|BURMA|BURMESE
+NA|NAM|NAMIBIA||NAMIBIAN
+NR|NRU|NAURU||NAURUAN
+NP|NPL|NEPAL||NEPALESE;NEPALI
+NL|NLD|NETHERLANDS|THE NETHERLANDS;HOLLAND|DUTCH;NETHERLANDER
+NC|NCL|NEW CALEDONIA||NEW CALEDONIAN
+NZ|NZL|NEW ZEALAND|AOTEAROA|NEW ZEALANDER;KIWI
+NI|NIC|NICARAGUA||NICARAGUAN
+NE|NER|NIGER||NIGERIEN
+NG|NGA|NIGERIA||NIGERIAN
+NU|NIU|NIUE||NIUEAN
+NF|NFK|NORFOLK ISLAND||
+MK|MKD|NORTH MACEDONIA|MACEDONIA|MACEDONIAN
+MP|MNP|NORTHERN MARIANA ISLANDS||
+NO|NOR|NORWAY||NORWEGIAN
+OM|OMN|OMAN||OMANI
+PK|PAK|PAKISTAN||PAKISTANI
+PW|PLW|PALAU||PALAUAN
+PS|PSE|PALESTINE|STATE OF PALESTINE;PALESTINIAN TERRITORIES|PALESTINIAN
+PA|PAN|PANAMA||PANAMANIAN
+PG|PNG|PAPUA NEW GUINEA||PAPUA NEW GUINEAN;PAPUAN
+PY|PRY|PARAGUAY||PARAGUAYAN
+PE|PER|PERU||PERUVIAN
+PH|PHL|PHILIPPINES|PILIPINAS|FILIPINO;FILIPINA;PHILIPPINE
+PN|PCN|PITCAIRN|PITCAIRN ISLANDS|
+PL|POL|POLAND|POLSKA|POLISH
+PT|PRT|PORTUGAL||PORTUGUESE
+PR|PRI|PUERTO RICO||PUERTO RICAN
+QA|QAT|QATAR||QATARI
+RE|REU|REUNION||
+RO|ROU|ROMANIA||ROMANIAN
+RU|RUS|RUSSIA|RUSSIAN FEDERATION|RUSSIAN
+RW|RWA|RWANDA||RWANDAN
+BL|BLM|SAINT BARTHELEMY|ST BARTHELEMY;ST BARTS|
+SH|SHN|SAINT HELENA, ASCENSION AND TRISTAN DA CUNHA|SAINT HELENA;ST HELENA|
+KN|KNA|SAINT KITTS AND NEVIS|ST KITTS AND NEVIS;SAINT KITTS;ST KITTS|KITTITIAN;NEVISIAN
+LC|LCA|SAINT LUCIA|ST LUCIA|SAINT LUCIAN;ST LUCIAN
+MF|MAF|SAINT MARTIN|ST MARTIN|
+PM|SPM|SAINT PIERRE AND MIQUELON|ST PIERRE AND MIQUELON|
+VC|VCT|SAINT VINCENT AND THE GRENADINES|ST VINCENT AND THE GRENADINES;SAINT VINCENT;ST VINCENT|VINCENTIAN
+WS|WSM|SAMOA||SAMOAN
+SM|SMR|SAN MARINO||SAMMARINESE
+ST|STP|SAO TOME AND PRINCIPE||SANTOMEAN
+SA|SAU|SAUDI ARABIA|KSA|SAUDI;SAUDI ARABIAN
+SN|SEN|SENEGAL||SENEGALESE
+RS|SRB|SERBIA||SERBIAN
+SC|SYC|SEYCHELLES||SEYCHELLOIS
+SL|SLE|SIERRA LEONE||SIERRA LEONEAN
+SG|SGP|SINGAPORE||SINGAPOREAN
+SX|SXM|SINT MAARTEN||
+SK|SVK|SLOVAKIA|SLOVAK REPUBLIC|SLOVAK
+SI|SVN|SLOVENIA||SLOVENIAN;SLOVENE
+SB|SLB|SOLOMON ISLANDS||SOLOMON ISLANDER
+SO|SOM|SOMALIA||SOMALI
+ZA|ZAF|SOUTH AFRICA|RSA|SOUTH AFRICAN
+GS|SGS|SOUTH GEORGIA AND THE SOUTH SANDWICH ISLANDS||
+SS|SSD|SOUTH SUDAN||SOUTH SUDANESE
+ES|ESP|SPAIN|ESPANA|SPANISH
+LK|LKA|SRI LANKA|CEYLON|SRI LANKAN
+SD|SDN|SUDAN||SUDANESE
+SR|SUR|SURINAME|SURINAM|SURINAMESE
+SJ|SJM|SVALBARD AND JAN MAYEN||
+SE|SWE|SWEDEN||SWEDISH;SWEDE
+CH|CHE|SWITZERLAND|SWISS CONFEDERATION;SCHWEIZ;SUISSE|SWISS
+SY|SYR|SYRIA|SYRIAN ARAB REPUBLIC|SYRIAN
+TW|TWN|TAIWAN|REPUBLIC OF CHINA;CHINESE TAIPEI|TAIWANESE
+TJ|TJK|TAJIKISTAN||TAJIK;TAJIKISTANI
+TZ|TZA|TANZANIA|UNITED REPUBLIC OF TANZANIA|TANZANIAN
+TH|THA|THAILAND|SIAM|THAI
+TL|TLS|TIMOR-LESTE|EAST TIMOR|TIMORESE
+TG|TGO|TOGO||TOGOLESE
+TK|TKL|TOKELAU||TOKELAUAN
+TO|TON|TONGA||TONGAN
+TT|TTO|TRINIDAD AND TOBAGO|TRINIDAD|TRINIDADIAN;TOBAGONIAN
+TN|TUN|TUNISIA||TUNISIAN
+TR|TUR|TURKIYE|TURKEY|TURKISH
+TM|TKM|TURKMENISTAN||TURKMEN
+TC|TCA|TURKS AND CAICOS ISLANDS|TURKS AND CAICOS|
+TV|TUV|TUVALU||TUVALUAN
+UG|UGA|UGANDA||UGANDAN
+UA|UKR|UKRAINE||UKRAINIAN
+AE|ARE|UNITED ARAB EMIRATES|UAE;EMIRATES|EMIRATI
+GB|GBR|UNITED KINGDOM|UNITED KINGDOM OF GREAT BRITAIN AND NORTHERN IRELAND;GREAT BRITAIN;BRITAIN;UK;ENGLAND;SCOTLAND;WALES;NORTHERN IRELAND|BRITISH;ENGLISH;SCOTTISH;WELSH
+US|USA|UNITED STATES|UNITED STATES OF AMERICA;USA;U.S.A.;U.S.;AMERICA|AMERICAN
+UM|UMI|UNITED STATES MINOR OUTLYING ISLANDS||
+UY|URY|URUGUAY||URUGUAYAN
+UZ|UZB|UZBEKISTAN||UZBEK;UZBEKISTANI
+VU|VUT|VANUATU||NI-VANUATU
+VE|VEN|VENEZUELA|BOLIVARIAN REPUBLIC OF VENEZUELA|VENEZUELAN
+VN|VNM|VIET NAM|VIETNAM|VIETNAMESE
+VG|VGB|BRITISH VIRGIN ISLANDS|VIRGIN ISLANDS, BRITISH|
+VI|VIR|UNITED STATES VIRGIN ISLANDS|US VIRGIN ISLANDS;VIRGIN ISLANDS, U.S.|
+WF|WLF|WALLIS AND FUTUNA||WALLISIAN;FUTUNAN
+EH|ESH|WESTERN SAHARA||SAHRAWI
+YE|YEM|YEMEN||YEMENI
+ZM|ZMB|ZAMBIA||ZAMBIAN
+ZW|ZWE|ZIMBABWE||ZIMBABWEAN
+XK|XKX|KOSOVO||KOSOVAR;KOSOVAN
+"""
+
+# ICAO Doc 9303 codes used in passport MRZs that are not ISO alpha-3
+_MRZ_CODES = {
+    "D": "DEU",
+    "GBD": "GBR",  # British Overseas Territories citizen
+    "GBN": "GBR",  # British National (Overseas)
+    "GBO": "GBR",  # British Overseas citizen
+    "GBP": "GBR",  # British protected person
+    "GBS": "GBR",  # British subject
+    "RKS": "XKX",  # Kosovo
+}
+
+_TOKEN_RE = re.compile(r"[A-Z]+")
+
+
+def _tokens(text):
+    """Uppercase ASCII word tokens; accents are folded, punctuation splits words"""
+    folded = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii")
+    return _TOKEN_RE.findall(folded.upper())
+
+
+def _build():
+    by_alpha2, by_alpha3, trie = {}, {}, {}
+    for line in _COUNTRY_TABLE.strip().splitlines():
+        alpha2, alpha3, name, aliases, demonyms = line.split("|")
+        country = Country(alpha2, alpha3, name)
+        by_alpha2[alpha2] = country
+        by_alpha3[alpha3] = country
+        for phrase in [name] + aliases.split(";") + demonyms.split(";"):
+            words = _tokens(phrase)
+            if not words:
+                continue
+            node = trie
+            for word in words:
+                node = node.setdefault(word, {})
+            node.setdefault(None, country)  # first entry wins on duplicates
+    return by_alpha2, by_alpha3, trie
+
+
+_BY_ALPHA2, _BY_ALPHA3, _TRIE = _build()
+
+
+def country_from_code(code):
+    """Look up an alpha-2, alpha-3 or MRZ country code; None if unknown"""
+    code = (code or "").strip().strip("<").upper()
+    if len(code) == 2:
+        return _BY_ALPHA2.get(code)
+    return _BY_ALPHA3.get(_MRZ_CODES.get(code, code))
+
+
+def find_country(text):
+    """
+    Return the first country named in text (by name, alias or demonym), else
+    None. Codes are not matched here: words like "IN" or "TO" would be taken
+    for countries. Use country_from_code for fields that hold a code.
+    """
+    words = _tokens(text or "")
+    for start in range(len(words)):
+        node, match = _TRIE, None
+        for word in words[start:]:
+            node = node.get(word)
+            if node is None:
+                break
+            match = node.get(None, match)
+        if match:
+            return match
+    return None
+
+
+def mrz_country(mrz_lines):
+    """
+    Nationality from a TD3 (passport) MRZ: line 2 positions 11-13, falling
+    back to the issuing state in line 1 positions 3-5.
+    """
+    lines = [line for line in mrz_lines if len(line) == 44]
+    if not lines:
+        return None
+    if not lines[0].startswith("P"):
+        return country_from_code(lines[0][10:13])
+    issuer = country_from_code(lines[0][2:5])
+    nationality = country_from_code(lines[1][10:13]) if len(lines) > 1 else None
+    return nationality or issuer
@@ -0,0 +1,114 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+from django.core.management.base import BaseCommand, CommandError
+
+UPLOAD_KINDS = ["memory", "temp_file"]
+DECODERS = ["Image.open + np.array", "decode_upload"]
+
+
+def _status_kb(field):
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(field + ":"):
+                return int(line.split()[1])
+    raise CommandError(f"{field} missing from /proc/self/status")
+
+
+def _make_upload(path, kind):
+    """The upload object Django would hand the view, built outside the measurement"""
+    import io
+    import shutil
+    from django.core.files.uploadedfile import InMemoryUploadedFile, TemporaryUploadedFile
+
+    name, size = os.path.basename(path), os.path.getsize(path)
+    with open(path, "rb") as f:
+        if kind == "memory":
+            return InMemoryUploadedFile(io.BytesIO(f.read()), "file", name, None, size, None)
+        upload = TemporaryUploadedFile(name, None, size, None)
+        shutil.copyfileobj(f, upload)
+    upload.flush()
+    return upload
+
+
+def measure(path, kind, decoder, repeat):
+    """
+    Run in a fresh process: the RSS high-water mark of one decode above the
+    RSS before it (reset through /proc/self/clear_refs), then the mean time.
+    RSS covers every buffer, including PIL's and OpenCV's native ones and
+    the mmap'd pages of a temp-file upload.
+    """
+    import django
+
+    django.setup()
+    import numpy as np
+    from PIL import Image
+    from api.ocr import decode_upload
+
+    def legacy(upload):
+        # What exportUserData used to do
+        upload.seek(0)
+        return np.array(Image.open(upload))
+
+    decode = legacy if decoder == DECODERS[0] else decode_upload
+    upload = _make_upload(path, kind)
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")  # reset VmHWM to the current RSS
+        baseline = _status_kb("VmRSS")
+        array = decode(upload)
+        peak_kb = _status_kb("VmHWM") - baseline
+        shape, frame_bytes = array.shape, array.nbytes
+        del array
+
+        started = time.perf_counter()
+        for _ in range(repeat):
+            decode(upload)
+        per_image = (time.perf_counter() - started) / repeat
+    finally:
+        upload.close()
+    return shape, frame_bytes, peak_kb * 1024, per_image
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the upload decode path: the old Image.open -> np.array pipeline against "
+        "decode_upload, for both in-memory and temp-file uploads. Each combination runs in "
+        "a fresh process and reports time per image and peak RSS growth in frames (Linux only)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("image", help="Image file to decode")
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **options):
+        path = options["image"]
+        if not os.path.isfile(path):
+            raise CommandError(f"No such file: {path}")
+        if not os.path.exists("/proc/self/clear_refs"):
+            raise CommandError("Measuring peak RSS needs Linux /proc")
+
+        results = {}
+        for kind in UPLOAD_KINDS:
+            for decoder in DECODERS:
+                # One process per measurement, so no allocator state carries over
+                with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+                    results[kind, decoder] = pool.submit(measure, path, kind, decoder, options["repeat"]).result()
+
+        shape, frame_bytes = results[UPLOAD_KINDS[0], DECODERS[1]][:2]
+        self.stdout.write(f">>> {path}: {shape[1]}x{shape[0]}, {frame_bytes / 1e6:.1f} MB per frame")
+        for kind in UPLOAD_KINDS:
+            self.stdout.write(f"    {kind} upload")
+            for decoder in DECODERS:
+                _, _, peak, per_image = results[kind, decoder]
+                self.stdout.write(
+                    f"      {decoder:<22} {per_image * 1000:7.1f} ms  peak RSS +{peak / 1e6:6.1f} MB "
+                    f"({peak / frame_bytes:.1f} frames)"
+                )
+            legacy, current = results[kind, DECODERS[0]], results[kind, DECODERS[1]]
+            self.stdout.write(self.style.SUCCESS(
+                f"      ✅ {legacy[3] / current[3]:.2f}x faster, "
+                f"{(legacy[2] - current[2]) / frame_bytes:.1f} frames less peak memory"
+            ))
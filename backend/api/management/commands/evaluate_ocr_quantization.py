@@ -0,0 +1,103 @@
+import os
+import re
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+
+
+def _normalize(text):
+    return re.sub(r'\s+', ' ', text.upper()).strip()
+
+
+def _edit_distance(a, b):
+    """Levenshtein distance between two strings"""
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ca != cb),
+            ))
+        previous = current
+    return previous[-1]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare fp32 and int8-quantized EasyOCR on a reference corpus: reports character "
+        "error rate and time per image for both. The corpus is a directory of images, each "
+        "with a .txt file of the same name holding the expected text."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--corpus", required=True, help="Directory of images and .txt references")
+        parser.add_argument("--repeat", type=int, default=3, help="Timed runs per image (best is kept)")
+
+    def _load_corpus(self, corpus_dir):
+        samples = []
+        for name in sorted(os.listdir(corpus_dir)):
+            stem, ext = os.path.splitext(name)
+            if ext.lower() not in IMAGE_EXTENSIONS:
+                continue
+            reference_path = os.path.join(corpus_dir, stem + '.txt')
+            if not os.path.exists(reference_path):
+                self.stdout.write(f"    skipping {name}: no {stem}.txt reference")
+                continue
+            with open(reference_path, encoding='utf-8') as f:
+                samples.append((name, os.path.join(corpus_dir, name), _normalize(f.read())))
+        return samples
+
+    def _evaluate(self, reader, samples, repeat):
+        import cv2
+        from api.ocr import results_to_text
+
+        errors = 0
+        reference_chars = 0
+        seconds = 0.0
+        for name, path, reference in samples:
+            image = cv2.imread(path, cv2.IMREAD_COLOR)
+            reader.readtext(image)  # warm-up, not timed
+            best = None
+            for _ in range(repeat):
+                started = time.perf_counter()
+                results = reader.readtext(image)
+                elapsed = time.perf_counter() - started
+                best = elapsed if best is None else min(best, elapsed)
+            hypothesis = _normalize(results_to_text(results))
+            errors += _edit_distance(reference, hypothesis)
+            reference_chars += len(reference)
+            seconds += best
+        cer = errors / reference_chars if reference_chars else 0.0
+        return cer, seconds / len(samples)
+
+    def handle(self, *args, **options):
+        import torch
+        from api.ocr import OCR_THREADS, build_reader
+
+        corpus_dir = options["corpus"]
+        if not os.path.isdir(corpus_dir):
+            raise CommandError(f"Corpus directory not found: {corpus_dir}")
+        samples = self._load_corpus(corpus_dir)
+        if not samples:
+            raise CommandError("Corpus has no image/.txt pairs")
+
+        torch.set_num_threads(OCR_THREADS)
+        self.stdout.write(f">>> Evaluating {len(samples)} images with {OCR_THREADS} threads...")
+
+        report = {}
+        for label, quantize in (("fp32", False), ("int8", True)):
+            reader = build_reader(quantize=quantize)
+            report[label] = self._evaluate(reader, samples, options["repeat"])
+            cer, per_image = report[label]
+            self.stdout.write(f"    {label}: CER {cer:.2%}, {per_image * 1000:.0f} ms/image")
+
+        fp32_cer, fp32_time = report["fp32"]
+        int8_cer, int8_time = report["int8"]
+        speedup = fp32_time / int8_time if int8_time else 0.0
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ int8 speedup {speedup:.2f}x, CER change {(int8_cer - fp32_cer) * 100:+.2f} points"
+        ))
@@ -0,0 +1,39 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = "Download the EasyOCR detector and recognizer weights into OCR_MODEL_DIR so workers can load them offline."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--model-dir",
+            default=settings.OCR_MODEL_DIR,
+            help="Directory to store the model bundle in (defaults to OCR_MODEL_DIR)",
+        )
+
+    def handle(self, *args, **options):
+        from api.ocr import OCR_LANGUAGES, build_reader
+
+        model_dir = options["model_dir"]
+        os.makedirs(model_dir, exist_ok=True)
+        self.stdout.write(f">>> Preparing EasyOCR models for {OCR_LANGUAGES} in {model_dir}...")
+
+        try:
+            build_reader(quantize=False, model_dir=model_dir, download_enabled=True)
+        except Exception as e:
+            raise CommandError(f"Failed to prepare EasyOCR models: {str(e)}")
+
+        # Reload with downloads disabled to prove the bundle is self-contained
+        try:
+            build_reader(quantize=False, model_dir=model_dir, download_enabled=False)
+        except Exception as e:
+            raise CommandError(f"Model bundle is incomplete: {str(e)}")
+
+        for name in sorted(os.listdir(model_dir)):
+            size_mb = os.path.getsize(os.path.join(model_dir, name)) / (1024 * 1024)
+            self.stdout.write(f"    {name} ({size_mb:.1f} MB)")
+
+        self.stdout.write(self.style.SUCCESS("✅ EasyOCR model bundle ready"))
@@ -0,0 +1,107 @@
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api.parsing import PARSER_VERSION, TRIP_FIELDS, parse_document_text, trip_fields_from_parsed
+
+
+def reparse_row(row):
+    """
+    Re-parse one stored trip in a worker process. Returns the upsert payload
+    if any derived field changed, else None.
+    """
+    fields = trip_fields_from_parsed(parse_document_text(row["raw_text"]))
+    if all((row.get(f) or None) == (fields[f] or None) for f in TRIP_FIELDS):
+        return None
+    return {"id": row["id"], "userId": row["userId"], **fields, "parser_version": PARSER_VERSION}
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-run parse_document_text over the raw text stored with each trip and write back "
+        "the trips whose extracted fields changed. Resumable from a checkpoint file."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--page-size", type=int, default=1000, help="Rows fetched from Supabase per page")
+        parser.add_argument("--batch-size", type=int, default=500, help="Changed rows written per upsert")
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Parser processes")
+        parser.add_argument(
+            "--checkpoint",
+            default=str(settings.BASE_DIR / ".reparse_checkpoint.json"),
+            help="File recording the last fully processed trip id",
+        )
+        parser.add_argument("--restart", action="store_true", help="Ignore any existing checkpoint")
+        parser.add_argument("--dry-run", action="store_true", help="Count changes without writing them")
+
+    def _load_checkpoint(self, path, restart):
+        if restart or not os.path.exists(path):
+            return {"last_id": None, "scanned": 0, "updated": 0}
+        with open(path) as f:
+            checkpoint = json.load(f)
+        if checkpoint.get("parser_version") != PARSER_VERSION:
+            self.stdout.write(
+                f">>> Checkpoint is for parser v{checkpoint.get('parser_version')}, "
+                f"starting over for v{PARSER_VERSION}"
+            )
+            return {"last_id": None, "scanned": 0, "updated": 0}
+        self.stdout.write(f">>> Resuming after trip {checkpoint['last_id']} ({checkpoint['scanned']} scanned)")
+        return checkpoint
+
+    def _save_checkpoint(self, path, checkpoint):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(dict(checkpoint, parser_version=PARSER_VERSION), f)
+        os.replace(tmp_path, path)
+
+    def _pages(self, supabase, last_id, page_size):
+        """Keyset-paginate trips that have stored raw text, ordered by id"""
+        columns = "id, userId, raw_text, " + ", ".join(TRIP_FIELDS)
+        while True:
+            query = supabase.table("trips").select(columns).not_.is_("raw_text", "null")
+            if last_id is not None:
+                query = query.gt("id", last_id)
+            res = query.order("id").limit(page_size).execute()
+            if hasattr(res, "error") and res.error:
+                raise CommandError(f"Supabase select failed: {str(res.error)}")
+            if not res.data:
+                return
+            yield res.data
+            last_id = res.data[-1]["id"]
+
+    def _write(self, supabase, rows, batch_size):
+        for start in range(0, len(rows), batch_size):
+            res = supabase.table("trips").upsert(rows[start:start + batch_size]).execute()
+            if hasattr(res, "error") and res.error:
+                raise CommandError(f"Supabase upsert failed: {str(res.error)}")
+
+    def handle(self, *args, **options):
+        supabase = settings.SUPABASE_CLIENT
+        checkpoint_path = options["checkpoint"]
+        checkpoint = self._load_checkpoint(checkpoint_path, options["restart"])
+        workers = max(1, options["workers"])
+
+        self.stdout.write(f">>> Re-parsing trips with parser v{PARSER_VERSION} on {workers} processes...")
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for page in self._pages(supabase, checkpoint["last_id"], options["page_size"]):
+                chunksize = max(1, len(page) // (workers * 4))
+                changed = [row for row in pool.map(reparse_row, page, chunksize=chunksize) if row]
+                if changed and not options["dry_run"]:
+                    self._write(supabase, changed, options["batch_size"])
+
+                checkpoint["last_id"] = page[-1]["id"]
+                checkpoint["scanned"] += len(page)
+                checkpoint["updated"] += len(changed)
+                if not options["dry_run"]:
+                    self._save_checkpoint(checkpoint_path, checkpoint)
+                self.stdout.write(f"    {checkpoint['scanned']} scanned, {checkpoint['updated']} changed")
+
+        if not options["dry_run"] and os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+        verb = "would change" if options["dry_run"] else "updated"
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Re-parse complete: {checkpoint['scanned']} scanned, {checkpoint['updated']} {verb}"
+        ))
@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = "Mirror the Supabase rules and required_docs tables into the local database."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--full", action="store_true", help="Re-copy every row and drop rows deleted upstream")
+        parser.add_argument(
+            "--interval",
+            type=int,
+            default=0,
+            help=(
+                "Keep running, syncing incrementally every INTERVAL seconds; a sync turns "
+                "full whenever REFERENCE_MIRROR_FULL_SYNC_INTERVAL has passed since the last"
+            ),
+        )
+
+    def handle(self, *args, **options):
+        from api.mirror import sync_reference_data
+
+        full = options["full"]
+        while True:
+            started = time.monotonic()
+            try:
+                counts = sync_reference_data(full=full)
+                summary = ", ".join(f"{table}: {count} rows" for table, count in counts.items())
+                self.stdout.write(self.style.SUCCESS(
+                    f"✅ Reference mirror synced{' (full)' if full else ''} in "
+                    f"{time.monotonic() - started:.1f}s: {summary}"
+                ))
+            except Exception as e:
+                if not options["interval"]:
+                    raise
+                self.stderr.write(f">>> Reference mirror sync failed: {str(e)}")
+            if not options["interval"]:
+                return
+            full = False
+            time.sleep(options["interval"])
@@ -0,0 +1,207 @@
+"""
+Local read mirror of the Supabase reference tables (rules, required_docs).
+
+Rows are copied into the local database by sync_reference_data(), either from
+`manage.py sync_reference_data` or in the background when a read finds the
+mirror older than REFERENCE_MIRROR_MAX_AGE. Reads go to the mirror while it is
+fresh; otherwise MirrorUnavailable tells the caller to query Supabase directly.
+If Supabase then fails, callers can read the stale rows with allow_stale=True.
+"""
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, transaction
+from django.utils import timezone
+
+from .models import REQUIRED_DOC_FIELDS, MirrorSyncState, RequiredDocs, Rules
+
+MIRRORED_TABLES = ["rules", "required_docs"]
+
+_refresh_lock = threading.Lock()
+
+
+class MirrorUnavailable(Exception):
+    """The mirror is disabled, stale, or unreadable; fall back to Supabase."""
+
+
+def _pages(table, watermark, page_size):
+    """
+    Source rows page by page: all of them keyset-paginated by id, or only
+    those updated after watermark.
+    """
+    supabase = settings.SUPABASE_CLIENT
+    offset = 0
+    last_id = None
+    while True:
+        query = supabase.table(table).select("*")
+        if watermark:
+            query = query.gt("updated_at", watermark).order("updated_at").range(offset, offset + page_size - 1)
+        else:
+            if last_id is not None:
+                query = query.gt("id", last_id)
+            query = query.order("id").limit(page_size)
+        res = query.execute()
+        if hasattr(res, "error") and res.error:
+            raise Exception(str(res.error))
+        if res.data:
+            yield res.data
+        if len(res.data) < page_size:
+            return
+        offset += page_size
+        last_id = res.data[-1]["id"]
+
+
+def _apply_rules(rows, generation):
+    Rules.objects.bulk_create(
+        [
+            Rules(
+                source_id=str(row["id"]),
+                country=row.get("country") or "",
+                nationality=row.get("nationality") or "",
+                purpose=row.get("purpose") or "",
+                data=row,
+                sync_generation=generation,
+            )
+            for row in rows
+        ],
+        update_conflicts=True,
+        unique_fields=["source_id"],
+        update_fields=["country", "nationality", "purpose", "data", "sync_generation"],
+    )
+
+
+def _apply_required_docs(rows, generation):
+    RequiredDocs.objects.bulk_create(
+        [
+            RequiredDocs(
+                destination_country=row["destination_country"].upper(),
+                others=row.get("others"),
+                sync_generation=generation,
+                **{field: bool(row.get(field)) for field in REQUIRED_DOC_FIELDS},
+            )
+            for row in rows
+        ],
+        update_conflicts=True,
+        unique_fields=["destination_country"],
+        update_fields=REQUIRED_DOC_FIELDS + ["others", "updated_at", "sync_generation"],
+    )
+
+
+_APPLY = {"rules": _apply_rules, "required_docs": _apply_required_docs}
+_MODELS = {"rules": Rules, "required_docs": RequiredDocs}
+
+
+def _full_sync_due(state):
+    interval = settings.REFERENCE_MIRROR_FULL_SYNC_INTERVAL
+    if not interval or not state.last_synced_at:
+        return False
+    return not state.last_full_sync_at or timezone.now() - state.last_full_sync_at > timedelta(seconds=interval)
+
+
+def _copy(table, watermark, generation, page_size):
+    """Upsert the source rows one page at a time; returns (rows copied, newest updated_at)"""
+    copied, newest = 0, ""
+    for rows in _pages(table, watermark, page_size):
+        with transaction.atomic():
+            _APPLY[table](rows, generation)
+        copied += len(rows)
+        newest = max([newest] + [str(row["updated_at"]) for row in rows if row.get("updated_at")])
+    return copied, newest
+
+
+def sync_table(table, full=False, page_size=1000):
+    """
+    Copy a Supabase table into the mirror, a page at a time. Incremental by
+    default: only rows with updated_at past the stored watermark are fetched.
+    A full sync (or a table without updated_at) stamps every row it copies
+    with a new generation, then drops the rows left on an older one, i.e.
+    those deleted upstream. One is also done whenever the last is older than
+    REFERENCE_MIRROR_FULL_SYNC_INTERVAL, since incremental syncs miss deletes.
+    """
+    state, _ = MirrorSyncState.objects.get_or_create(table=table)
+    if not full and _full_sync_due(state):
+        print(f">>> Last full sync of {table} was at {state.last_full_sync_at}, doing a full sync")
+        full = True
+    watermark = None if full else state.watermark or None
+    try:
+        copied, newest = _copy(table, watermark, state.generation if watermark else state.generation + 1, page_size)
+    except Exception as e:
+        if not watermark:
+            raise
+        print(f">>> Incremental sync of {table} failed ({str(e)}), doing a full sync")
+        watermark = None
+        copied, newest = _copy(table, None, state.generation + 1, page_size)
+
+    with transaction.atomic():
+        state.last_synced_at = timezone.now()
+        if not watermark:
+            state.generation += 1
+            _MODELS[table].objects.filter(sync_generation__lt=state.generation).delete()
+            state.last_full_sync_at = state.last_synced_at
+        if newest:
+            state.watermark = max(newest, state.watermark or "")
+        state.save()
+    return copied
+
+
+def sync_reference_data(full=False):
+    """Sync every mirrored table; returns {table: rows copied}"""
+    return {table: sync_table(table, full=full) for table in MIRRORED_TABLES}
+
+
+def _background_refresh():
+    try:
+        counts = sync_reference_data()
+        print(f">>> Reference mirror refreshed: {counts}")
+    except Exception as e:
+        print(f">>> Reference mirror refresh failed: {str(e)}")
+    finally:
+        close_old_connections()
+        _refresh_lock.release()
+
+
+def _ensure_fresh(table, allow_stale=False):
+    if not settings.REFERENCE_MIRROR_ENABLED:
+        raise MirrorUnavailable("mirror disabled")
+    try:
+        state = MirrorSyncState.objects.filter(table=table).first()
+    except DatabaseError as e:
+        raise MirrorUnavailable(str(e))
+    if state and state.last_synced_at:
+        age = timezone.now() - state.last_synced_at
+        if age <= timedelta(seconds=settings.REFERENCE_MIRROR_MAX_AGE):
+            return
+        if allow_stale:
+            print(f">>> WARNING: serving {table} from a stale mirror ({int(age.total_seconds())}s since last sync)")
+            return
+    # Stale: serve this request from Supabase and refresh once in the background
+    if _refresh_lock.acquire(blocking=False):
+        threading.Thread(target=_background_refresh, name="mirror-refresh", daemon=True).start()
+    raise MirrorUnavailable(f"{table} mirror is stale")
+
+
+def mirrored_rules(country, nationality, purpose, allow_stale=False):
+    """Rules rows for the lookup, as Supabase would return them"""
+    _ensure_fresh("rules", allow_stale)
+    try:
+        rows = Rules.objects.filter(country=country, nationality=nationality, purpose=purpose).order_by("id")
+        return [row.data for row in rows]
+    except DatabaseError as e:
+        raise MirrorUnavailable(str(e))
+
+
+def mirrored_required_doc(destination_country, allow_stale=False):
+    """The required_docs row for an alpha-2 code as a dict, or None if there is none"""
+    _ensure_fresh("required_docs", allow_stale)
+    try:
+        doc = RequiredDocs.objects.filter(destination_country=destination_country).first()
+    except DatabaseError as e:
+        raise MirrorUnavailable(str(e))
+    if doc is None:
+        return None
+    return {
+        "destination_country": doc.destination_country,
+        "others": doc.others,
+        **{field: getattr(doc, field) for field in REQUIRED_DOC_FIELDS},
+    }
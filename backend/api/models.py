@@ -2,6 +2,13 @@ from django.db import models
 
 # Create your models here.
 
+# Boolean document columns of required_docs, in checklist order
+REQUIRED_DOC_FIELDS = [
+    'passport', 'passport_photo', 'visa_application_form', 'bank_statement',
+    'employment_letter', 'travel_itinerary', 'hotel_booking', 'travel_insurance',
+    'invitation_letter', 'criminal_background_check', 'medical_certificate'
+]
+
 class RequiredDocs(models.Model):
     """
     Model representing required documents for visa applications by destination country.
@@ -27,6 +34,7 @@ class RequiredDocs(models.Model):
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    sync_generation = models.PositiveIntegerField(default=0, help_text="Mirror full sync that last copied this row")
     
     class Meta:
         db_table = 'required_docs'
@@ -36,6 +44,42 @@ class RequiredDocs(models.Model):
     def __str__(self):
         return f"Required docs for {self.destination_country}"
 
+class Rules(models.Model):
+    """
+    Local read mirror of the 'rules' table in Supabase (see api/mirror.py).
+    The full Supabase row is kept in `data`; the lookup columns are copied out
+    so they can be indexed.
+    """
+    source_id = models.CharField(max_length=64, unique=True, help_text="Row id in Supabase")
+    country = models.CharField(max_length=100)
+    nationality = models.CharField(max_length=100)
+    purpose = models.CharField(max_length=100)
+    data = models.JSONField(help_text="Full row as returned by Supabase")
+    sync_generation = models.PositiveIntegerField(default=0, help_text="Mirror full sync that last copied this row")
+
+    class Meta:
+        db_table = 'rules'
+        indexes = [
+            models.Index(fields=['country', 'nationality', 'purpose'], name='rules_lookup_idx'),
+        ]
+
+    def __str__(self):
+        return f"Rules for {self.nationality} -> {self.country} ({self.purpose})"
+
+class MirrorSyncState(models.Model):
+    """Bookkeeping for the local mirror of one Supabase table"""
+    table = models.CharField(max_length=64, unique=True)
+    last_synced_at = models.DateTimeField(null=True, blank=True)
+    watermark = models.CharField(max_length=64, blank=True, help_text="Highest source updated_at mirrored so far")
+    last_full_sync_at = models.DateTimeField(null=True, blank=True)
+    generation = models.PositiveIntegerField(default=0, help_text="Number of the last completed full sync")
+
+    class Meta:
+        db_table = 'mirror_sync_state'
+
+    def __str__(self):
+        return f"{self.table} synced at {self.last_synced_at}"
+
 class Trips(models.Model):
     nationality = models.CharField(max_length=100, blank=True)
     destination = models.CharField(max_length=100, blank=True)
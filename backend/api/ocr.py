@@ -0,0 +1,447 @@
+import io
+import mmap
+import os
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+
+from django.conf import settings
+
+def available_cpus():
+    """
+    CPUs this process may actually use: OCR_CPUS if set, else the CPU affinity
+    mask, further capped by a cgroup v2 CPU quota (containers, PaaS dynos).
+    os.cpu_count() reports the host's cores and over-budgets in containers.
+    """
+    if settings.OCR_CPUS:
+        return settings.OCR_CPUS
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:  # not available on macOS/Windows
+        cpus = os.cpu_count() or 1
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            cpus = min(cpus, max(1, int(quota) // int(period)))
+    except (OSError, ValueError):
+        pass
+    return cpus
+
+
+# Each OCR job gets an equal share of the available CPUs. This has to be in the
+# environment before torch (pulled in by easyocr) spins up its thread pools.
+OCR_THREADS = max(1, available_cpus() // max(1, settings.OCR_MAX_CONCURRENT))
+os.environ.setdefault("OMP_NUM_THREADS", str(OCR_THREADS))
+os.environ.setdefault("MKL_NUM_THREADS", str(OCR_THREADS))
+
+import cv2
+import easyocr
+import numpy as np
+import torch
+
+try:
+    import fcntl
+except ImportError:  # Windows dev machines: fall back to a per-process limit
+    fcntl = None
+
+
+class OCRBusy(Exception):
+    """Raised when the OCR wait queue is full or no slot frees up within OCR_QUEUE_TIMEOUT."""
+
+    def __init__(self, retry_after):
+        super().__init__(f"OCR capacity exhausted, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class OCRUnavailable(Exception):
+    """Raised when the EasyOCR reader could not be loaded (e.g. missing model bundle)."""
+
+
+class OCRAdmission:
+    """
+    Host-wide cap on concurrent OCR jobs.
+
+    Every gunicorn worker on the host competes for the same set of slot files
+    in OCR_LOCK_DIR; holding an exclusive flock on one of them is holding a
+    slot. The kernel drops the lock if the worker dies, so slots never leak.
+    Waiting is itself capped the same way, with a second set of lock files:
+    a request that finds every slot and every waiter place taken fails at once.
+    """
+
+    def __init__(self, slots, lock_dir, timeout, retry_after, max_queued=0, poll_interval=0.05):
+        self.slots = max(1, slots)
+        self.max_queued = max(0, max_queued)
+        self.lock_dir = lock_dir
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self.poll_interval = poll_interval
+        if fcntl is None:
+            self._semaphore = threading.BoundedSemaphore(self.slots)
+            self._waiters = threading.BoundedSemaphore(self.max_queued) if self.max_queued else None
+        else:
+            os.makedirs(self.lock_dir, exist_ok=True)
+
+    def _try_lock(self, prefix, count):
+        for i in range(count):
+            path = os.path.join(self.lock_dir, f"{prefix}-{i}.lock")
+            fd = os.open(path, os.O_CREAT | os.O_RDWR, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return fd
+            except BlockingIOError:
+                os.close(fd)
+        return None
+
+    def _unlock(self, fd):
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+
+    def _wait_for_slot(self):
+        """Slot fd, waiting in a waiter place if none is free right away"""
+        fd = self._try_lock("ocr-slot", self.slots)
+        if fd is not None:
+            return fd
+        waiter = self._try_lock("ocr-wait", self.max_queued)
+        if waiter is None:
+            raise OCRBusy(self.retry_after)
+        try:
+            deadline = time.monotonic() + self.timeout
+            while fd is None:
+                if time.monotonic() >= deadline:
+                    raise OCRBusy(self.retry_after)
+                time.sleep(self.poll_interval)
+                fd = self._try_lock("ocr-slot", self.slots)
+            return fd
+        finally:
+            self._unlock(waiter)
+
+    @contextmanager
+    def slot(self):
+        if fcntl is None:
+            if not self._semaphore.acquire(blocking=False):
+                if self._waiters is None or not self._waiters.acquire(blocking=False):
+                    raise OCRBusy(self.retry_after)
+                try:
+                    if not self._semaphore.acquire(timeout=self.timeout):
+                        raise OCRBusy(self.retry_after)
+                finally:
+                    self._waiters.release()
+            try:
+                yield
+            finally:
+                self._semaphore.release()
+            return
+
+        fd = self._wait_for_slot()
+        try:
+            yield
+        finally:
+            self._unlock(fd)
+
+
+admission = OCRAdmission(
+    slots=settings.OCR_MAX_CONCURRENT,
+    lock_dir=settings.OCR_LOCK_DIR,
+    timeout=settings.OCR_QUEUE_TIMEOUT,
+    retry_after=settings.OCR_RETRY_AFTER,
+    max_queued=settings.OCR_MAX_QUEUED,
+)
+
+OCR_LANGUAGES = ['en']  # English only for better performance
+
+# Initialize EasyOCR reader (lazy loading to avoid startup delays)
+_ocr_reader = None
+_ocr_reader_lock = threading.Lock()
+
+# Reported by the readiness endpoint
+ocr_state = {
+    "status": "not_loaded",  # not_loaded | loading | ready | failed
+    "warmed_up": False,
+    "load_seconds": None,
+    "error": None,
+}
+
+def build_reader(quantize, model_dir=None, download_enabled=None):
+    """
+    Construct an EasyOCR reader. With quantize=True EasyOCR applies int8
+    dynamic quantization to the recognizer's LSTM/Linear layers on CPU; the
+    CRAFT detector is all convolutions, which dynamic quantization leaves as is.
+    """
+    return easyocr.Reader(
+        OCR_LANGUAGES,
+        gpu=False,
+        model_storage_directory=model_dir or settings.OCR_MODEL_DIR,
+        download_enabled=settings.OCR_ALLOW_MODEL_DOWNLOAD if download_enabled is None else download_enabled,
+        quantize=quantize,
+    )
+
+def get_ocr_reader():
+    """Get or create EasyOCR reader instance from the local model directory"""
+    global _ocr_reader
+    with _ocr_reader_lock:
+        if _ocr_reader is None:
+            ocr_state.update(status="loading", error=None)
+            started = time.monotonic()
+            try:
+                print(f">>> Initializing EasyOCR reader from {settings.OCR_MODEL_DIR} "
+                      f"({OCR_THREADS} threads, quantize={settings.OCR_QUANTIZE})...")
+                torch.set_num_threads(OCR_THREADS)
+                _ocr_reader = build_reader(quantize=settings.OCR_QUANTIZE)
+                ocr_state.update(status="ready", load_seconds=round(time.monotonic() - started, 3))
+                print(">>> EasyOCR reader initialized successfully")
+            except Exception as e:
+                print(f">>> Failed to initialize EasyOCR: {str(e)}")
+                ocr_state.update(status="failed", error=str(e))
+                _ocr_reader = None
+    return _ocr_reader
+
+def warm_up_ocr():
+    """
+    Load the reader and push a dummy image through detection and recognition,
+    so torch's lazy allocations happen before the first real upload.
+    """
+    reader = get_ocr_reader()
+    if reader is None:
+        return False
+    try:
+        dummy = np.full((64, 256, 3), 255, dtype=np.uint8)
+        with admission.slot():
+            reader.readtext(dummy)
+            # A blank page yields no boxes, so run the recognizer on the whole image too
+            reader.recognize(dummy[:, :, 0])
+        ocr_state["warmed_up"] = True
+        print(">>> EasyOCR warm-up completed")
+        return True
+    except Exception as e:
+        print(f">>> EasyOCR warm-up failed: {str(e)}")
+        return False
+
+def _warm_up_until_done():
+    """Retry the warm-up with backoff until it succeeds or real traffic warms the reader"""
+    delay = settings.OCR_RETRY_AFTER
+    while not ocr_state["warmed_up"] and not warm_up_ocr():
+        print(f">>> Retrying EasyOCR warm-up in {delay}s")
+        time.sleep(delay)
+        delay = min(delay * 2, 60)
+
+def start_warm_up():
+    """Warm up in the background so the worker can start serving immediately"""
+    threading.Thread(target=_warm_up_until_done, name="ocr-warm-up", daemon=True).start()
+
+@contextmanager
+def _upload_buffer(uploaded_file):
+    """
+    Expose the raw bytes of a Django upload without copying them: a memoryview
+    of the in-memory BytesIO, or a read-only mmap of the spooled temp file.
+    """
+    if hasattr(uploaded_file, "temporary_file_path"):
+        with open(uploaded_file.temporary_file_path(), "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                raise ValueError("Uploaded image is empty")
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                yield buffer
+    elif isinstance(uploaded_file.file, io.BytesIO):
+        buffer = uploaded_file.file.getbuffer()
+        try:
+            yield buffer
+        finally:
+            buffer.release()
+    else:
+        uploaded_file.seek(0)
+        yield uploaded_file.read()
+
+def decode_upload(uploaded_file):
+    """
+    Decode an uploaded image straight from its upload buffer into a
+    contiguous HxWx3 uint8 RGB array. Palette, greyscale and RGBA images are
+    normalized by the decoder itself. EasyOCR passes a 3-channel array to the
+    detector unchanged, and CRAFT normalizes with RGB ImageNet means, so the
+    decoder's BGR output is swapped to RGB in place, just as EasyOCR does when
+    it decodes bytes itself.
+    """
+    with _upload_buffer(uploaded_file) as buffer:
+        encoded = np.frombuffer(buffer, dtype=np.uint8)
+        try:
+            image = cv2.imdecode(encoded, cv2.IMREAD_COLOR)
+        finally:
+            del encoded  # release the buffer export before the mmap/view is closed
+    if image is None:
+        raise ValueError("Unsupported or corrupt image")
+    return cv2.cvtColor(image, cv2.COLOR_BGR2RGB, dst=image)
+
+def results_to_text(results):
+    """Combine all detected text"""
+    extracted_text = ""
+    for (bbox, text, confidence) in results:
+        if confidence > 0.2:  # Only include text with decent confidence
+            extracted_text += text + "\n"
+    return extracted_text.strip()
+
+def _as_rgb(image):
+    """Coerce an image array to the HxWx3 RGB layout a detector batch uses"""
+    if image.ndim == 2:
+        return cv2.cvtColor(image, cv2.COLOR_GRAY2RGB)
+    if image.shape[2] == 4:
+        return image[:, :, :3]
+    return image
+
+def readtext_batch(reader, images):
+    """
+    EasyOCR over several images, with one detector forward pass per group of
+    same-sized images; recognition then runs per image on its own crops, the
+    same way EasyOCR's readtext_batched does. Only identical sizes share a
+    pass: EasyOCR scales a batch by one ratio taken from its longest side, so
+    padding a small image up to a large one would change what is detected.
+    Images without a same-sized peer go through plain readtext.
+    """
+    results = [None] * len(images)
+    groups = {}
+    for i, image in enumerate(images):
+        groups.setdefault(image.shape[:2], []).append(i)
+
+    for indexes in groups.values():
+        if len(indexes) == 1:
+            results[indexes[0]] = reader.readtext(images[indexes[0]])
+            continue
+        group = [_as_rgb(images[i]) for i in indexes]
+        horizontal_lists, free_lists = reader.detect(np.stack(group), reformat=False)
+        for i, image, horizontal_list, free_list in zip(indexes, group, horizontal_lists, free_lists):
+            # readtext derives grey with BGR2GRAY even from RGB input; match it
+            grey = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+            results[i] = reader.recognize(grey, horizontal_list, free_list, reformat=False)
+    return results
+
+
+class OCRBatcher:
+    """
+    Micro-batches OCR requests of the same image size from the request
+    threads of this worker.
+
+    The first request of a given height x width opens a group and waits up to
+    OCR_BATCH_WINDOW_MS for same-sized uploads to join (up to
+    OCR_BATCH_MAX_SIZE), then runs the group on its own thread in one
+    admission slot and one detector pass. Groups of different sizes run in
+    parallel, each in its own slot, just as unbatched requests would. The
+    reader is also called outside groups (warm-up, and submit when batching
+    is off), always inside an admission slot.
+    """
+
+    def __init__(self, window, max_size):
+        self.window = window
+        self.max_size = max(1, max_size)
+        self._open = {}  # (height, width) -> group still accepting images
+        self._open_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "batches": 0,
+            "images": 0,
+            "batch_sizes": {},
+            "shared_detect_images": 0,
+            "total_wait_ms": 0.0,
+            "max_wait_ms": 0.0,
+            "total_run_ms": 0.0,
+        }
+
+    def submit(self, reader, image):
+        """Queue an image and block until its readtext-style results are ready"""
+        if self.max_size == 1:
+            with admission.slot():
+                return reader.readtext(image)
+
+        key = image.shape[:2]
+        future = Future()
+        with self._open_lock:
+            group = self._open.get(key)
+            leader = group is None
+            if leader:
+                group = self._open[key] = {"entries": [], "full": threading.Event()}
+            group["entries"].append((image, future, time.monotonic()))
+            if len(group["entries"]) >= self.max_size:
+                del self._open[key]
+                group["full"].set()
+
+        if leader:
+            group["full"].wait(self.window)
+            with self._open_lock:
+                if self._open.get(key) is group:
+                    del self._open[key]
+            self._run(reader, group["entries"])
+        return future.result()
+
+    def _run(self, reader, batch):
+        started = time.monotonic()
+        waits_ms = [(started - queued_at) * 1000 for _, _, queued_at in batch]
+        images = [image for image, _, _ in batch]
+        try:
+            with admission.slot():
+                results = readtext_batch(reader, images)
+        except Exception as e:
+            for _, future, _ in batch:
+                future.set_exception(e)
+            return
+        for (_, future, _), result in zip(batch, results):
+            future.set_result(result)
+
+        run_ms = (time.monotonic() - started) * 1000
+        sizes = {}
+        for image in images:
+            sizes[image.shape[:2]] = sizes.get(image.shape[:2], 0) + 1
+        with self._stats_lock:
+            stats = self._stats
+            stats["batches"] += 1
+            stats["images"] += len(batch)
+            stats["batch_sizes"][len(batch)] = stats["batch_sizes"].get(len(batch), 0) + 1
+            stats["shared_detect_images"] += sum(count for count in sizes.values() if count > 1)
+            stats["total_wait_ms"] += sum(waits_ms)
+            stats["max_wait_ms"] = max(stats["max_wait_ms"], max(waits_ms))
+            stats["total_run_ms"] += run_ms
+        print(f">>> OCR batch: {len(batch)} images, max queue wait {max(waits_ms):.0f} ms, ran {run_ms:.0f} ms")
+
+    def metrics(self):
+        """Batch size and queue wait figures for this worker"""
+        with self._stats_lock:
+            stats = dict(self._stats, batch_sizes=dict(self._stats["batch_sizes"]))
+        batches, images = stats["batches"], stats["images"]
+        return {
+            "window_ms": self.window * 1000,
+            "max_batch_size": self.max_size,
+            "batches": batches,
+            "images": images,
+            "mean_batch_size": round(images / batches, 2) if batches else 0,
+            "batch_sizes": stats["batch_sizes"],
+            # Images whose detector pass was shared with at least one other image
+            "shared_detect_images": stats["shared_detect_images"],
+            "shared_detect_ratio": round(stats["shared_detect_images"] / images, 3) if images else 0,
+            "mean_wait_ms": round(stats["total_wait_ms"] / images, 1) if images else 0,
+            "max_wait_ms": round(stats["max_wait_ms"], 1),
+            "mean_run_ms_per_image": round(stats["total_run_ms"] / images, 1) if images else 0,
+        }
+
+
+batcher = OCRBatcher(
+    window=settings.OCR_BATCH_WINDOW_MS / 1000,
+    max_size=settings.OCR_BATCH_MAX_SIZE,
+)
+
+def extract_text_easyocr(image):
+    """Extract text from image using EasyOCR, batched with concurrent uploads in this worker"""
+    try:
+        reader = get_ocr_reader()
+        if reader is None:
+            raise OCRUnavailable(ocr_state["error"] or "EasyOCR reader not available")
+
+        # decode_upload already yields an RGB array; PIL images still need converting
+        img_array = image if isinstance(image, np.ndarray) else np.array(image)
+
+        # Extract text
+        results = batcher.submit(reader, img_array)
+        ocr_state["warmed_up"] = True  # a real inference warms the reader just as well
+
+        return results_to_text(results)
+    except (OCRBusy, OCRUnavailable):
+        raise
+    except Exception as e:
+        print(f">>> EasyOCR extraction failed: {str(e)}")
+        return None
@@ -0,0 +1,210 @@
+import re
+from datetime import datetime
+
+from .gazetteer import country_from_code, find_country, mrz_country
+
+# Bump whenever parse_document_text changes what it extracts, so stored trips
+# can be re-parsed with `manage.py reparse_documents`.
+PARSER_VERSION = 3
+
+# Trip columns derived from the parsed document
+TRIP_FIELDS = ["nationality", "destination", "purpose", "departure_date", "arrival_date"]
+
+_CODE_RE = re.compile(r'[A-Z]{2,3}')
+
+
+def country_from_field(value):
+    """
+    Country for a captured field value, read from its first non-empty line
+    only (the capture runs on into the following OCR lines): by name first,
+    then as a code when that line is a single 2-3 letter token (e.g. "CAN").
+    """
+    first_line = next((line.strip() for line in value.splitlines() if line.strip()), '')
+    country = find_country(first_line)
+    if country:
+        return country
+    if _CODE_RE.fullmatch(first_line):
+        return country_from_code(first_line)
+    return None
+
+
+def parse_document_text(text):
+    parsed_data = {}
+    text_upper = text.upper()
+
+    # Country fields are normalized to the codes the trip form uses:
+    # nationality as ISO alpha-3 (ICAO), destination as ISO alpha-2.
+    # Extract nationality (for backend use)
+    for pattern in [r'NATIONALITY[:\s]+([^:\d]+)', r'COUNTRY[:\s]+([^:\d]+)', r'ISSUED BY[:\s]+([^:\d]+)']:
+        match = re.search(pattern, text_upper)
+        if match:
+            country = country_from_field(match.group(1))
+            if country:
+                parsed_data['nationality'] = country.alpha3
+                break
+
+    # Extract destination (for backend use)
+    for pattern in [r'DESTINATION[:\s]+([^:\d]+)', r'VISITING[:\s]+([^:\d]+)', r'TRAVEL TO[:\s]+([^:\d]+)']:
+        match = re.search(pattern, text_upper)
+        if match:
+            country = country_from_field(match.group(1))
+            if country:
+                parsed_data['destination'] = country.alpha2
+
+    # Extract purpose (for backend use)
+    purposes = ['TOURISM', 'BUSINESS', 'EDUCATION', 'MEDICAL', 'FAMILY', 'TRANSIT']
+    for pattern in [r'PURPOSE[:\s]+([A-Z\s]+)', r'REASON[:\s]+([A-Z\s]+)', r'TYPE OF VISIT[:\s]+([A-Z\s]+)']:
+        match = re.search(pattern, text_upper)
+        if match:
+            purpose_text = match.group(1).strip()
+            for p in purposes:
+                if p in purpose_text:
+                    parsed_data['purpose'] = p
+                    break
+
+    # Extract dates (for backend use)
+    date_patterns = [r'(\d{1,2}[/-]\d{1,2}[/-]\d{4})', r'(\d{4}[/-]\d{1,2}[/-]\d{1,2})', r'(\d{1,2}\s+[A-Z]{3}\s+\d{4})']
+    dates_found = []
+    for pattern in date_patterns:
+        dates_found.extend(re.findall(pattern, text))
+
+    parsed_dates = []
+    for date_str in dates_found[:2]:
+        for fmt in ['%m/%d/%Y', '%d/%m/%Y', '%Y/%m/%d', '%d %b %Y', '%d %B %Y']:
+            try:
+                parsed_date = datetime.strptime(date_str, fmt).date()
+                parsed_dates.append(parsed_date)
+                break
+            except ValueError:
+                continue
+    if len(parsed_dates) >= 1:
+        parsed_data['departure_date'] = parsed_dates[0]
+    if len(parsed_dates) >= 2:
+        parsed_data['arrival_date'] = parsed_dates[1]
+
+    # FRONTEND-SPECIFIC EXTRACTIONS
+    # Extract full name
+    name_patterns = [
+        r'NAME[:\s]+([A-Z\s]+)',
+        r'FULL NAME[:\s]+([A-Z\s]+)',
+        r'GIVEN NAME[:\s]+([A-Z\s]+)',
+        r'SURNAME[:\s]+([A-Z\s]+)',
+    ]
+    for pattern in name_patterns:
+        match = re.search(pattern, text_upper)
+        if match:
+            parsed_data['fullName'] = match.group(1).strip()
+            break
+    
+    # Extract passport number
+    passport_patterns = [
+        r'PASSPORT[:\s]+([A-Z0-9]+)',
+        r'PASSPORT NO[:\s\.]*([A-Z0-9]+)',
+        r'DOCUMENT NO[:\s\.]*([A-Z0-9]+)',
+        r'PASSPORT NUMBER[:\s\.]*([A-Z0-9]+)',
+    ]
+    for pattern in passport_patterns:
+        match = re.search(pattern, text_upper)
+        if match:
+            parsed_data['passportNumber'] = match.group(1).strip()
+            break
+    
+    # Extract date of birth
+    dob_patterns = [
+        r'DATE OF BIRTH[:\s]+([0-9/-]+)',
+        r'DOB[:\s]+([0-9/-]+)',
+        r'BIRTH[:\s]+([0-9/-]+)',
+        r'BORN[:\s]+([0-9/-]+)',
+    ]
+    for pattern in dob_patterns:
+        match = re.search(pattern, text_upper)
+        if match:
+            parsed_data['dateOfBirth'] = match.group(1).strip()
+            break
+    
+    # Extract MRZ (Machine Readable Zone) - passport bottom lines
+    mrz_pattern = r'([A-Z0-9<]{44})'  # Standard MRZ line length
+    mrz_matches = re.findall(mrz_pattern, text_upper)
+    if mrz_matches:
+        parsed_data['mrz'] = '\n'.join(mrz_matches[:2])  # Usually 2 lines
+        if 'nationality' not in parsed_data:
+            country = mrz_country(mrz_matches[:2])
+            if country:
+                parsed_data['nationality'] = country.alpha3
+    
+    # Extract expiry date
+    expiry_patterns = [
+        r'EXPIRY[:\s]+([0-9/-]+)',
+        r'EXPIRES[:\s]+([0-9/-]+)',
+        r'VALID UNTIL[:\s]+([0-9/-]+)',
+        r'EXP[:\s]+([0-9/-]+)',
+    ]
+    for pattern in expiry_patterns:
+        match = re.search(pattern, text_upper)
+        if match:
+            parsed_data['expiry'] = match.group(1).strip()
+            break
+    
+    # Extract address
+    address_patterns = [
+        r'ADDRESS[:\s]+([A-Z0-9\s,.-]+?)(?:\n|$)',
+        r'RESIDENCE[:\s]+([A-Z0-9\s,.-]+?)(?:\n|$)',
+        r'HOME ADDRESS[:\s]+([A-Z0-9\s,.-]+?)(?:\n|$)',
+    ]
+    for pattern in address_patterns:
+        match = re.search(pattern, text_upper)
+        if match:
+            parsed_data['address'] = match.group(1).strip()[:200]  # Limit length
+            break
+    
+    # Extract bank balance
+    balance_patterns = [
+        r'BALANCE[:\s]+HKD?\s*([0-9,]+)',
+        r'HKD\s*([0-9,]+)',
+        r'([0-9,]+)\s*HKD',
+        r'CURRENT BALANCE[:\s]+([0-9,]+)',
+        r'ACCOUNT BALANCE[:\s]+([0-9,]+)',
+    ]
+    for pattern in balance_patterns:
+        match = re.search(pattern, text_upper)
+        if match:
+            try:
+                balance_str = match.group(1).replace(',', '')
+                parsed_data['bankBalanceHKD'] = int(balance_str)
+            except ValueError:
+                pass
+            break
+    
+    # Set defaults for missing frontend fields
+    frontend_defaults = {
+        'mrz': '',
+        'fullName': '',
+        'dateOfBirth': '',
+        'passportNumber': '',
+        'expiry': '',
+        'address': '',
+        'bankBalanceHKD': 0
+    }
+    
+    for key, default_value in frontend_defaults.items():
+        if key not in parsed_data:
+            parsed_data[key] = default_value
+    
+    # Ensure nationality is always set for frontend
+    if 'nationality' not in parsed_data:
+        parsed_data['nationality'] = ''
+
+    return parsed_data
+
+
+def trip_fields_from_parsed(parsed_data):
+    """Map parse_document_text output onto the trips columns it fills"""
+    departure_date = parsed_data.get("departure_date")
+    arrival_date = parsed_data.get("arrival_date")
+    return {
+        "nationality": parsed_data.get("nationality", ""),
+        "destination": parsed_data.get("destination", ""),
+        "purpose": parsed_data.get("purpose", ""),
+        "departure_date": departure_date.isoformat() if departure_date else None,
+        "arrival_date": arrival_date.isoformat() if arrival_date else None,
+    }
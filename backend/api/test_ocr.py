@@ -0,0 +1,107 @@
+import threading
+import time
+
+import numpy as np
+from django.test import SimpleTestCase
+
+# Importing api.ocr loads torch, easyocr and cv2; these tests are kept apart
+# from api/tests.py so the parser tests run without the OCR stack.
+from .ocr import OCRBatcher, readtext_batch
+
+
+class FakeReader:
+    """
+    Stands in for easyocr.Reader: finds one box spanning the whole detector
+    input, so any padding or rescaling shows up in the returned boxes.
+    """
+
+    def __init__(self, delay=0):
+        self.delay = delay
+        self.detect_shapes = []
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def _result(self, height, width):
+        return [([[0, 0], [width, 0], [width, height], [0, height]], "TEXT", 1.0)]
+
+    def _busy(self):
+        with self._lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(self.delay)
+        with self._lock:
+            self.active -= 1
+
+    def readtext(self, image):
+        self._busy()
+        return self._result(*image.shape[:2])
+
+    def detect(self, batch, reformat=True):
+        self._busy()
+        self.detect_shapes.append(batch.shape)
+        count, height, width = batch.shape[:3]
+        return [[[0, width, 0, height]]] * count, [[]] * count
+
+    def recognize(self, grey, horizontal_list, free_list, reformat=True):
+        x_min, x_max, y_min, y_max = horizontal_list[0]
+        return self._result(y_max - y_min, x_max - x_min)
+
+
+def blank(height, width, channels=3):
+    shape = (height, width, channels) if channels else (height, width)
+    return np.full(shape, 255, dtype=np.uint8)
+
+
+class ReadtextBatchTests(SimpleTestCase):
+    def test_mixed_sizes_match_separate_readtext_calls(self):
+        reader = FakeReader()
+        images = [blank(40, 60), blank(800, 1200)]
+        self.assertEqual(readtext_batch(reader, images), [reader.readtext(image) for image in images])
+        self.assertEqual(reader.detect_shapes, [])
+
+    def test_same_sizes_share_a_detector_pass(self):
+        reader = FakeReader()
+        images = [blank(40, 60), blank(800, 1200), blank(40, 60, channels=0)]
+        self.assertEqual(readtext_batch(reader, images), [reader.readtext(image) for image in images])
+        self.assertEqual(reader.detect_shapes, [(2, 40, 60, 3)])
+
+
+class OCRBatcherTests(SimpleTestCase):
+    def _submit_together(self, batcher, reader, images):
+        results = [None] * len(images)
+
+        def submit(i):
+            results[i] = batcher.submit(reader, images[i])
+
+        threads = [threading.Thread(target=submit, args=(i,)) for i in range(len(images))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_same_sizes_share_one_detector_pass(self):
+        batcher = OCRBatcher(window=1, max_size=2)
+        reader = FakeReader()
+        images = [blank(40, 60), blank(40, 60)]
+        results = self._submit_together(batcher, reader, images)
+
+        self.assertEqual(results, [reader.readtext(image) for image in images])
+        self.assertEqual(reader.detect_shapes, [(2, 40, 60, 3)])
+        metrics = batcher.metrics()
+        self.assertEqual(metrics["batches"], 1)
+        self.assertEqual(metrics["shared_detect_images"], 2)
+
+    def test_different_sizes_run_in_parallel(self):
+        batcher = OCRBatcher(window=0.05, max_size=4)
+        reader = FakeReader(delay=0.2)
+        images = [blank(40, 60), blank(800, 1200)]
+        results = self._submit_together(batcher, reader, images)
+
+        self.assertEqual(results, [FakeReader().readtext(image) for image in images])
+        self.assertEqual(reader.detect_shapes, [])
+        self.assertEqual(reader.max_active, 2)
+        metrics = batcher.metrics()
+        self.assertEqual(metrics["batches"], 2)
+        self.assertEqual(metrics["shared_detect_images"], 0)
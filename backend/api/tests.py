@@ -1,3 +1,95 @@
-from django.test import TestCase
+from datetime import date
+
+from django.test import SimpleTestCase
+
+from .gazetteer import country_from_code, find_country, mrz_country
+from .parsing import parse_document_text
+
+
+class GazetteerTests(SimpleTestCase):
+    def test_find_country_by_name_alias_and_demonym(self):
+        self.assertEqual(find_country("JAPAN").alpha2, "JP")
+        self.assertEqual(find_country("GREAT BRITAIN").alpha2, "GB")
+        self.assertEqual(find_country("CANADIAN CITIZEN").alpha2, "CA")
+
+    def test_find_country_prefers_longest_match(self):
+        self.assertEqual(find_country("AMERICAN SAMOA").alpha2, "AS")
+        self.assertEqual(find_country("AMERICAN").alpha2, "US")
+
+    def test_find_country_folds_accents(self):
+        self.assertEqual(find_country("Côte d'Ivoire").alpha2, "CI")
+
+    def test_find_country_ignores_codes(self):
+        self.assertIsNone(find_country("MY FAMILY IN THE CITY"))
+        self.assertIsNone(find_country("TO BE DECIDED"))
+        self.assertIsNone(find_country(""))
+
+    def test_country_from_code(self):
+        self.assertEqual(country_from_code("de").alpha3, "DEU")
+        self.assertEqual(country_from_code("CAN").alpha2, "CA")
+        self.assertEqual(country_from_code("D<<").alpha3, "DEU")
+        self.assertIsNone(country_from_code("ZZZ"))
+
+    def test_mrz_country_reads_nationality(self):
+        lines = [
+            "P<UTOERIKSSON<<ANNA<MARIA<<<<<<<<<<<<<<<<<<<",
+            "L898902C36UTO7408122F1204159ZE184226B<<<<<10",
+        ]
+        self.assertIsNone(mrz_country(lines))
+        lines[1] = lines[1].replace("UTO", "CAN")
+        self.assertEqual(mrz_country(lines).alpha3, "CAN")
+
+    def test_mrz_country_falls_back_to_issuer(self):
+        lines = [
+            "P<D<<MUSTERMANN<<ERIKA<<<<<<<<<<<<<<<<<<<<<<",
+            "C01X00T478XXX6408125F2702283<<<<<<<<<<<<<<<4",
+        ]
+        self.assertEqual(mrz_country(lines).alpha3, "DEU")
+
+
+class ParseDocumentTextTests(SimpleTestCase):
+    def test_country_names_and_codes(self):
+        parsed = parse_document_text("NATIONALITY: CAN\nDESTINATION: JAPAN\nPURPOSE: TOURISM")
+        self.assertEqual(parsed["nationality"], "CAN")
+        self.assertEqual(parsed["destination"], "JP")
+        self.assertEqual(parsed["purpose"], "TOURISM")
+
+        parsed = parse_document_text("NATIONALITY: CANADIAN\nDESTINATION: FR")
+        self.assertEqual(parsed["nationality"], "CAN")
+        self.assertEqual(parsed["destination"], "FR")
+
+    def test_common_words_are_not_country_codes(self):
+        parsed = parse_document_text("VISITING: MY FAMILY IN THE CITY")
+        self.assertFalse(parsed.get("destination"))
+        parsed = parse_document_text("TRAVEL TO: TO BE DECIDED")
+        self.assertFalse(parsed.get("destination"))
+        parsed = parse_document_text("COUNTRY: IS NOT LISTED")
+        self.assertFalse(parsed.get("nationality"))
+
+    def test_country_names_on_following_lines_are_ignored(self):
+        parsed = parse_document_text("VISITING: MY FAMILY IN PARIS\nHOST NAME CHAD MILLER")
+        self.assertFalse(parsed.get("destination"))
+        parsed = parse_document_text("TRAVEL TO: MY COUSIN\nSIGNED JORDAN LEE")
+        self.assertFalse(parsed.get("destination"))
+        parsed = parse_document_text("NATIONALITY: STATELESS\nSURNAME GEORGIA")
+        self.assertFalse(parsed.get("nationality"))
+
+    def test_value_on_the_line_after_its_label(self):
+        parsed = parse_document_text("NATIONALITY:\nGERMAN\nDESTINATION:\nJPN")
+        self.assertEqual(parsed["nationality"], "DEU")
+        self.assertEqual(parsed["destination"], "JP")
+
+    def test_mrz_nationality_fallback(self):
+        text = (
+            "PASSPORT\n"
+            "P<CANMARTIN<<SARAH<<<<<<<<<<<<<<<<<<<<<<<<<<\n"
+            "AB1234567<4CAN9001014F3001012<<<<<<<<<<<<<06\n"
+        )
+        parsed = parse_document_text(text)
+        self.assertEqual(parsed["nationality"], "CAN")
+
+    def test_dates(self):
+        parsed = parse_document_text("DEPART 2025/03/01 RETURN 2025/03/15")
+        self.assertEqual(parsed["departure_date"], date(2025, 3, 1))
+        self.assertEqual(parsed["arrival_date"], date(2025, 3, 15))
 
-# Create your tests here.
@@ -2,58 +2,33 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.decorators import api_view
 from django.conf import settings
+from django.db import close_old_connections
 import uuid
 import json
-import easyocr
-from PIL import Image
 import PyPDF2
 import io
-import re
 from datetime import datetime
 import platform
-import numpy as np
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 
-supabase = settings.SUPABASE_CLIENT
+from .gazetteer import country_from_code, find_country
+from .mirror import MirrorUnavailable, mirrored_required_doc, mirrored_rules
+from .models import REQUIRED_DOC_FIELDS
+from .ocr import OCRBusy, OCRUnavailable, batcher, decode_upload, extract_text_easyocr, ocr_state
+from .parsing import PARSER_VERSION, parse_document_text, trip_fields_from_parsed
 
-# Initialize EasyOCR reader (lazy loading to avoid startup delays)
-_ocr_reader = None
+supabase = settings.SUPABASE_CLIENT
 
-def get_ocr_reader():
-    """Get or create EasyOCR reader instance"""
-    global _ocr_reader
-    if _ocr_reader is None:
-        try:
-            print(">>> Initializing EasyOCR reader...")
-            _ocr_reader = easyocr.Reader(['en'])  # English only for better performance
-            print(">>> EasyOCR reader initialized successfully")
-        except Exception as e:
-            print(f">>> Failed to initialize EasyOCR: {str(e)}")
-            _ocr_reader = None
-    return _ocr_reader
+# Fans out the rules/checklist fetches of the bootstrap endpoint. A section
+# only starts when a pool thread is free: one that times out keeps running,
+# and nothing should queue behind it.
+BOOTSTRAP_THREADS = 8
+_bootstrap_pool = ThreadPoolExecutor(max_workers=BOOTSTRAP_THREADS, thread_name_prefix="bootstrap")
+_bootstrap_slots = threading.BoundedSemaphore(BOOTSTRAP_THREADS)
 
-def extract_text_easyocr(image):
-    """Extract text from image using EasyOCR"""
-    try:
-        reader = get_ocr_reader()
-        if reader is None:
-            raise Exception("EasyOCR reader not available")
-        
-        # Convert PIL image to numpy array
-        img_array = np.array(image)
-        
-        # Extract text
-        results = reader.readtext(img_array)
-        
-        # Combine all detected text
-        extracted_text = ""
-        for (bbox, text, confidence) in results:
-            if confidence > 0.2:  # Only include text with decent confidence
-                extracted_text += text + "\n"
-        
-        return extracted_text.strip()
-    except Exception as e:
-        print(f">>> EasyOCR extraction failed: {str(e)}")
-        return None
 
 class TripListCreateView(APIView):
     def post(self, request):
@@ -122,15 +97,17 @@ class TripDetailView(APIView):
         return Response(res.data[0], status=200)
 
 
-class RulesView(APIView):
-    def get(self, request):
-        country = request.query_params.get("country")
-        nationality = request.query_params.get("nationality")
-        purpose = request.query_params.get("purpose")
-
-        if not all([country, nationality, purpose]):
-            return Response({"error": "country, nationality, and purpose are required"}, status=400)
+def fetch_rules(country, nationality, purpose):
+    """
+    Rules rows for a lookup, from the local mirror when fresh, else Supabase,
+    else (if Supabase fails) the stale mirror.
+    """
+    try:
+        return mirrored_rules(country, nationality, purpose)
+    except MirrorUnavailable:
+        pass
 
+    try:
         res = (
             supabase.table("rules")
             .select("*")
@@ -140,31 +117,52 @@ class RulesView(APIView):
             .execute()
         )
         if hasattr(res, "error") and res.error:
-            return Response({"error": str(res.error)}, status=500)
-
-        return Response(res.data, status=200)
+            raise Exception(str(res.error))
+        return res.data
+    except Exception as e:
+        print(f">>> Supabase rules lookup failed ({str(e)}), trying the stale mirror")
+        try:
+            return mirrored_rules(country, nationality, purpose, allow_stale=True)
+        except MirrorUnavailable:
+            raise e
 
 
-@api_view(['GET'])
-def getChecklist(request, id):
-    destination_country = request.GET.get('destination_country')
-    if not destination_country:
-        return Response({'error': 'destination_country parameter is required'}, status=400)
+def fetch_required_doc(destination_country):
+    """
+    The required_docs row for an alpha-2 code (or None), from the local mirror
+    when fresh, else Supabase, else (if Supabase fails) the stale mirror.
+    """
+    try:
+        return mirrored_required_doc(destination_country)
+    except MirrorUnavailable:
+        pass
 
     try:
-        res = supabase.table("required_docs").select("*").eq("destination_country", destination_country.upper()).execute()
-        if not res.data:
-            return Response({'error': f'No requirements found for: {destination_country}'}, status=404)
+        res = supabase.table("required_docs").select("*").eq("destination_country", destination_country).execute()
+        if hasattr(res, "error") and res.error:
+            raise Exception(str(res.error))
+        return res.data[0] if res.data else None
+    except Exception as e:
+        print(f">>> Supabase required_docs lookup failed ({str(e)}), trying the stale mirror")
+        try:
+            return mirrored_required_doc(destination_country, allow_stale=True)
+        except MirrorUnavailable:
+            raise e
+
 
-        required_doc = res.data[0]
-        document_fields = [
-            'passport', 'passport_photo', 'visa_application_form', 'bank_statement',
-            'employment_letter', 'travel_itinerary', 'hotel_booking', 'travel_insurance',
-            'invitation_letter', 'criminal_background_check', 'medical_certificate'
-        ]
+def build_checklist(id, destination_country):
+    """Checklist payload and HTTP status for a destination (any code or name)"""
+    # required_docs is keyed by alpha-2; also accept alpha-3 codes and country names
+    country = country_from_code(destination_country) or find_country(destination_country)
+    destination_country = country.alpha2 if country else destination_country.upper()
+
+    try:
+        required_doc = fetch_required_doc(destination_country)
+        if not required_doc:
+            return {'error': f'No requirements found for: {destination_country}'}, 404
 
         required_documents = []
-        for field in document_fields:
+        for field in REQUIRED_DOC_FIELDS:
             if required_doc.get(field):
                 readable_name = field.replace('_', ' ').title()
                 required_documents.append({"field": field, "name": readable_name, "required": True})
@@ -178,16 +176,115 @@ def getChecklist(request, id):
             except Exception:
                 others_data = [{'name': required_doc["others"], 'required': True}]
 
-        return Response({
+        return {
             'application_id': id,
-            'destination_country': destination_country.upper(),
+            'destination_country': destination_country,
             'required_documents': required_documents,
             'others': others_data,
             'total_requirements': len(required_documents) + len(others_data)
-        }, status=200)
+        }, 200
 
     except Exception as e:
-        return Response({'error': str(e)}, status=500)
+        return {'error': str(e)}, 500
+
+
+class RulesView(APIView):
+    def get(self, request):
+        country = request.query_params.get("country")
+        nationality = request.query_params.get("nationality")
+        purpose = request.query_params.get("purpose")
+
+        if not all([country, nationality, purpose]):
+            return Response({"error": "country, nationality, and purpose are required"}, status=400)
+
+        try:
+            return Response(fetch_rules(country, nationality, purpose), status=200)
+        except Exception as e:
+            return Response({"error": str(e)}, status=500)
+
+
+@api_view(['GET'])
+def getChecklist(request, id):
+    destination_country = request.GET.get('destination_country')
+    if not destination_country:
+        return Response({'error': 'destination_country parameter is required'}, status=400)
+
+    payload, status = build_checklist(id, destination_country)
+    return Response(payload, status=status)
+
+
+def _run_section(fn, *args):
+    """Run a bootstrap section on a pool thread, closing any DB connection it opened"""
+    try:
+        return fn(*args)
+    finally:
+        close_old_connections()
+        _bootstrap_slots.release()
+
+
+def _start_section(fn, *args):
+    """Future for a bootstrap section, or None if every pool thread is busy"""
+    if not _bootstrap_slots.acquire(blocking=False):
+        return None
+    try:
+        return _bootstrap_pool.submit(_run_section, fn, *args)
+    except Exception:
+        _bootstrap_slots.release()
+        raise
+
+
+@api_view(['GET'])
+def getBootstrap(request, id):
+    """
+    Everything the application page needs in one round trip: the trip, then
+    its rules and checklist fetched concurrently. A failing section reports
+    its own error instead of failing the whole response.
+    """
+    res = supabase.table("trips").select("*").eq("id", id).execute()
+    if hasattr(res, "error") and res.error:
+        return Response({"error": str(res.error)}, status=500)
+    if not res.data:
+        return Response({"error": "Not found"}, status=404)
+    trip = res.data[0]
+
+    country = trip.get("destination")
+    nationality = trip.get("nationality")
+    purpose = trip.get("purpose")
+    rules = {"data": None, "error": None}
+    checklist = {"data": None, "error": None}
+
+    rules_future = checklist_future = None
+    if all([country, nationality, purpose]):
+        rules_future = _start_section(fetch_rules, country, nationality, purpose)
+        if rules_future is None:
+            rules["error"] = "Server busy, try again"
+    else:
+        rules["error"] = "Trip is missing destination, nationality or purpose"
+    if country:
+        checklist_future = _start_section(build_checklist, id, country)
+        if checklist_future is None:
+            checklist["error"] = "Server busy, try again"
+    else:
+        checklist["error"] = "Trip has no destination"
+
+    # One deadline for both sections, so the slowest case is one timeout, not two
+    deadline = time.monotonic() + settings.BOOTSTRAP_SECTION_TIMEOUT
+    if rules_future:
+        try:
+            rules["data"] = rules_future.result(timeout=max(0, deadline - time.monotonic()))
+        except Exception as e:
+            rules["error"] = str(e) or type(e).__name__
+    if checklist_future:
+        try:
+            payload, status = checklist_future.result(timeout=max(0, deadline - time.monotonic()))
+            if status == 200:
+                checklist["data"] = payload
+            else:
+                checklist["error"] = payload.get("error")
+        except Exception as e:
+            checklist["error"] = str(e) or type(e).__name__
+
+    return Response({"trip": trip, "rules": rules, "checklist": checklist}, status=200)
 
 
 @api_view(['POST'])
@@ -243,30 +340,28 @@ def exportUserData(request, id):
         else:
             try:
                 print(">>> Processing image...")
-                image = Image.open(uploaded_file)
-                print(f">>> Image opened: {image.size}, {image.mode}")
+                image = decode_upload(uploaded_file)
+                print(f">>> Image decoded: {image.shape[1]}x{image.shape[0]}")
                 
                 # Use EasyOCR for text extraction
-                try:
-                    print(">>> Starting EasyOCR text extraction...")
-                    extracted_text = extract_text_easyocr(image)
-                    print(f">>> EasyOCR completed, text length: {len(extracted_text)}")
-                except Exception as ocr_error:
-                    print(f">>> EasyOCR failed: {str(ocr_error)}")
-                    print(">>> Using mock data for testing...")
-                    # For testing purposes, return mock passport data
-                    extracted_text = """
-                    PASSPORT
-                    NATIONALITY: CANADA
-                    NAME: JOHN DOE
-                    PASSPORT NO: AB123456
-                    DATE OF BIRTH: 15/06/1990
-                    EXPIRY: 15/06/2030
-                    ADDRESS: 123 MAIN STREET TORONTO ONTARIO
-                    """
-                    print(">>> Using mock OCR data for testing")
-                
+                print(">>> Starting EasyOCR text extraction...")
+                extracted_text = extract_text_easyocr(image)
+                if extracted_text is None:
+                    return Response({'error': 'Text extraction failed'}, status=500)
                 print(f">>> OCR completed, text length: {len(extracted_text)}")
+            except OCRBusy as busy:
+                print(f">>> OCR BUSY: {str(busy)}")
+                return Response(
+                    {'error': 'OCR capacity exhausted, please retry shortly'},
+                    status=503,
+                    headers={'Retry-After': str(busy.retry_after)},
+                )
+            except OCRUnavailable as unavailable:
+                print(f">>> OCR UNAVAILABLE: {str(unavailable)}")
+                return Response(
+                    {'error': 'OCR is unavailable', 'detail': str(unavailable)},
+                    status=503,
+                )
             except Exception as e:
                 print(f">>> IMAGE ERROR: {str(e)}")
                 return Response({'error': f'Error processing image: {str(e)}'}, status=500)
@@ -278,20 +373,16 @@ def exportUserData(request, id):
         parsed_data = parse_document_text(extracted_text)
         print(f">>> PARSED DATA: {parsed_data}")
         
-        # Convert date objects to strings for JSON serialization
-        departure_date = parsed_data.get("departure_date")
-        arrival_date = parsed_data.get("arrival_date")
-        
         trip_data = {
             # ✅ must be "userId" to match trips schema
             "userId": id,
-            "nationality": parsed_data.get("nationality", ""),
-            "destination": parsed_data.get("destination", ""),
-            "purpose": parsed_data.get("purpose", ""),
-            "departure_date": departure_date.isoformat() if departure_date else None,
-            "arrival_date": arrival_date.isoformat() if arrival_date else None,
+            **trip_fields_from_parsed(parsed_data),
         }
-        print(f">>> TRIP DATA: {trip_data}")
+        if settings.STORE_RAW_TEXT:
+            # Keep the source text so later parser versions can re-parse this trip
+            trip_data["raw_text"] = extracted_text
+            trip_data["parser_version"] = PARSER_VERSION
+        print(f">>> TRIP DATA: { {k: v for k, v in trip_data.items() if k != 'raw_text'} }")
 
         res = supabase.table("trips").insert([trip_data]).execute()  # ✅ list wrapper
         if hasattr(res, "error") and res.error:
@@ -313,180 +404,6 @@ def exportUserData(request, id):
         return Response({'error': f'Unexpected error: {str(e)}'}, status=500)
 
 
-def parse_document_text(text):
-    parsed_data = {}
-    text_upper = text.upper()
-    countries = [
-        'UNITED STATES', 'CANADA', 'UNITED KINGDOM', 'FRANCE', 'GERMANY',
-        'ITALY', 'SPAIN', 'JAPAN', 'CHINA', 'INDIA', 'AUSTRALIA', 'BRAZIL',
-        'MEXICO', 'RUSSIA', 'SOUTH AFRICA', 'NIGERIA', 'EGYPT', 'THAILAND',
-        'SINGAPORE', 'MALAYSIA', 'PHILIPPINES', 'INDONESIA', 'VIETNAM'
-    ]
-
-    # Extract nationality (for backend use)
-    for pattern in [r'NATIONALITY[:\s]+([A-Z\s]+)', r'COUNTRY[:\s]+([A-Z\s]+)', r'ISSUED BY[:\s]+([A-Z\s]+)']:
-        match = re.search(pattern, text_upper)
-        if match:
-            nationality = match.group(1).strip()
-            for country in countries:
-                if country in nationality:
-                    parsed_data['nationality'] = country
-                    break
-            if 'nationality' in parsed_data:
-                break
-
-    # Extract destination (for backend use)
-    for pattern in [r'DESTINATION[:\s]+([A-Z\s]+)', r'VISITING[:\s]+([A-Z\s]+)', r'TRAVEL TO[:\s]+([A-Z\s]+)']:
-        match = re.search(pattern, text_upper)
-        if match:
-            destination = match.group(1).strip()
-            for country in countries:
-                if country in destination:
-                    parsed_data['destination'] = country
-                    break
-
-    # Extract purpose (for backend use)
-    purposes = ['TOURISM', 'BUSINESS', 'EDUCATION', 'MEDICAL', 'FAMILY', 'TRANSIT']
-    for pattern in [r'PURPOSE[:\s]+([A-Z\s]+)', r'REASON[:\s]+([A-Z\s]+)', r'TYPE OF VISIT[:\s]+([A-Z\s]+)']:
-        match = re.search(pattern, text_upper)
-        if match:
-            purpose_text = match.group(1).strip()
-            for p in purposes:
-                if p in purpose_text:
-                    parsed_data['purpose'] = p
-                    break
-
-    # Extract dates (for backend use)
-    date_patterns = [r'(\d{1,2}[/-]\d{1,2}[/-]\d{4})', r'(\d{4}[/-]\d{1,2}[/-]\d{1,2})', r'(\d{1,2}\s+[A-Z]{3}\s+\d{4})']
-    dates_found = []
-    for pattern in date_patterns:
-        dates_found.extend(re.findall(pattern, text))
-
-    parsed_dates = []
-    for date_str in dates_found[:2]:
-        for fmt in ['%m/%d/%Y', '%d/%m/%Y', '%Y/%m/%d', '%d %b %Y', '%d %B %Y']:
-            try:
-                parsed_date = datetime.strptime(date_str, fmt).date()
-                parsed_dates.append(parsed_date)
-                break
-            except ValueError:
-                continue
-    if len(parsed_dates) >= 1:
-        parsed_data['departure_date'] = parsed_dates[0]
-    if len(parsed_dates) >= 2:
-        parsed_data['arrival_date'] = parsed_dates[1]
-
-    # FRONTEND-SPECIFIC EXTRACTIONS
-    # Extract full name
-    name_patterns = [
-        r'NAME[:\s]+([A-Z\s]+)',
-        r'FULL NAME[:\s]+([A-Z\s]+)',
-        r'GIVEN NAME[:\s]+([A-Z\s]+)',
-        r'SURNAME[:\s]+([A-Z\s]+)',
-    ]
-    for pattern in name_patterns:
-        match = re.search(pattern, text_upper)
-        if match:
-            parsed_data['fullName'] = match.group(1).strip()
-            break
-    
-    # Extract passport number
-    passport_patterns = [
-        r'PASSPORT[:\s]+([A-Z0-9]+)',
-        r'PASSPORT NO[:\s\.]*([A-Z0-9]+)',
-        r'DOCUMENT NO[:\s\.]*([A-Z0-9]+)',
-        r'PASSPORT NUMBER[:\s\.]*([A-Z0-9]+)',
-    ]
-    for pattern in passport_patterns:
-        match = re.search(pattern, text_upper)
-        if match:
-            parsed_data['passportNumber'] = match.group(1).strip()
-            break
-    
-    # Extract date of birth
-    dob_patterns = [
-        r'DATE OF BIRTH[:\s]+([0-9/-]+)',
-        r'DOB[:\s]+([0-9/-]+)',
-        r'BIRTH[:\s]+([0-9/-]+)',
-        r'BORN[:\s]+([0-9/-]+)',
-    ]
-    for pattern in dob_patterns:
-        match = re.search(pattern, text_upper)
-        if match:
-            parsed_data['dateOfBirth'] = match.group(1).strip()
-            break
-    
-    # Extract MRZ (Machine Readable Zone) - passport bottom lines
-    mrz_pattern = r'([A-Z0-9<]{44})'  # Standard MRZ line length
-    mrz_matches = re.findall(mrz_pattern, text_upper)
-    if mrz_matches:
-        parsed_data['mrz'] = '\n'.join(mrz_matches[:2])  # Usually 2 lines
-    
-    # Extract expiry date
-    expiry_patterns = [
-        r'EXPIRY[:\s]+([0-9/-]+)',
-        r'EXPIRES[:\s]+([0-9/-]+)',
-        r'VALID UNTIL[:\s]+([0-9/-]+)',
-        r'EXP[:\s]+([0-9/-]+)',
-    ]
-    for pattern in expiry_patterns:
-        match = re.search(pattern, text_upper)
-        if match:
-            parsed_data['expiry'] = match.group(1).strip()
-            break
-    
-    # Extract address
-    address_patterns = [
-        r'ADDRESS[:\s]+([A-Z0-9\s,.-]+?)(?:\n|$)',
-        r'RESIDENCE[:\s]+([A-Z0-9\s,.-]+?)(?:\n|$)',
-        r'HOME ADDRESS[:\s]+([A-Z0-9\s,.-]+?)(?:\n|$)',
-    ]
-    for pattern in address_patterns:
-        match = re.search(pattern, text_upper)
-        if match:
-            parsed_data['address'] = match.group(1).strip()[:200]  # Limit length
-            break
-    
-    # Extract bank balance
-    balance_patterns = [
-        r'BALANCE[:\s]+HKD?\s*([0-9,]+)',
-        r'HKD\s*([0-9,]+)',
-        r'([0-9,]+)\s*HKD',
-        r'CURRENT BALANCE[:\s]+([0-9,]+)',
-        r'ACCOUNT BALANCE[:\s]+([0-9,]+)',
-    ]
-    for pattern in balance_patterns:
-        match = re.search(pattern, text_upper)
-        if match:
-            try:
-                balance_str = match.group(1).replace(',', '')
-                parsed_data['bankBalanceHKD'] = int(balance_str)
-            except ValueError:
-                pass
-            break
-    
-    # Set defaults for missing frontend fields
-    frontend_defaults = {
-        'mrz': '',
-        'fullName': '',
-        'dateOfBirth': '',
-        'passportNumber': '',
-        'expiry': '',
-        'address': '',
-        'bankBalanceHKD': 0
-    }
-    
-    for key, default_value in frontend_defaults.items():
-        if key not in parsed_data:
-            parsed_data[key] = default_value
-    
-    # Ensure nationality is always set for frontend
-    if 'nationality' not in parsed_data:
-        parsed_data['nationality'] = ''
-
-    return parsed_data
-
-
 @api_view(["GET"])
 def supabase_ping(request):
     import requests, os
@@ -506,4 +423,28 @@ def local_health(request):
         "message": "This is local health check, no egress",
         "time": datetime.datetime.utcnow().isoformat() + "Z",
         "python_version": platform.python_version()
-    })
\ No newline at end of file
+    })
+
+
+@api_view(["GET"])
+def readiness(request):
+    """
+    Report OCR model load state. With boot warm-up on, 503 until the reader is
+    loaded and warm; with it off the reader loads lazily, so only a failed
+    load makes the worker unready.
+    """
+    if settings.OCR_WARMUP_ON_BOOT:
+        ready = ocr_state["status"] == "ready" and ocr_state["warmed_up"]
+    else:
+        ready = ocr_state["status"] != "failed"
+    return Response({
+        "ready": ready,
+        "ocr": ocr_state,
+        "model_dir": settings.OCR_MODEL_DIR,
+    }, status=200 if ready else 503)
+
+
+@api_view(["GET"])
+def ocr_metrics(request):
+    """OCR micro-batching metrics for the worker that serves this request"""
+    return Response({"pid": os.getpid(), "batching": batcher.metrics()})
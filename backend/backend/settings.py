@@ -1,5 +1,6 @@
 from pathlib import Path
 import os
+import tempfile
 from supabase import create_client
 from dotenv import load_dotenv
 
@@ -76,4 +77,61 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 CORS_ALLOW_ALL_ORIGINS = True
 
 # Disable APPEND_SLASH to avoid issues with API endpoints
-APPEND_SLASH = False
\ No newline at end of file
+APPEND_SLASH = False
+
+# OCR admission control: at most OCR_MAX_CONCURRENT OCR jobs run at once on
+# this host (shared by all gunicorn workers through lock files in
+# OCR_LOCK_DIR), each with OCR_CPUS // OCR_MAX_CONCURRENT torch threads.
+# At most OCR_MAX_QUEUED more may wait for a slot, each for up to
+# OCR_QUEUE_TIMEOUT seconds; anything beyond that gets a 503 with
+# Retry-After: OCR_RETRY_AFTER straight away instead of tying up a worker.
+OCR_MAX_CONCURRENT = int(os.getenv("OCR_MAX_CONCURRENT", "2"))
+OCR_MAX_QUEUED = int(os.getenv("OCR_MAX_QUEUED", "4"))
+OCR_QUEUE_TIMEOUT = float(os.getenv("OCR_QUEUE_TIMEOUT", "10"))
+OCR_RETRY_AFTER = int(os.getenv("OCR_RETRY_AFTER", "5"))
+OCR_LOCK_DIR = os.getenv("OCR_LOCK_DIR", os.path.join(tempfile.gettempdir(), "tourism-ocr-slots"))
+# CPUs to split between OCR jobs; 0 detects them from the CPU affinity mask
+# and cgroup quota. Set it explicitly where neither reflects the allowance.
+OCR_CPUS = int(os.getenv("OCR_CPUS", "0"))
+
+# EasyOCR weights live in OCR_MODEL_DIR (populate it with
+# `manage.py prepare_ocr_models`). Set OCR_ALLOW_MODEL_DOWNLOAD=0 on hosts
+# without network access so a missing bundle fails fast instead of hanging on
+# a download; OCR_WARMUP_ON_BOOT runs a dummy inference when a worker starts.
+OCR_MODEL_DIR = os.getenv("OCR_MODEL_DIR", str(BASE_DIR / "ocr_models"))
+OCR_ALLOW_MODEL_DOWNLOAD = os.getenv("OCR_ALLOW_MODEL_DOWNLOAD", "1") == "1"
+OCR_WARMUP_ON_BOOT = os.getenv("OCR_WARMUP_ON_BOOT", "1") == "1"
+
+# int8 dynamic quantization of the EasyOCR recognizer (CPU only). Use
+# `manage.py evaluate_ocr_quantization --corpus <dir>` to compare character
+# error rate and speed against the fp32 model on your own documents.
+OCR_QUANTIZE = os.getenv("OCR_QUANTIZE", "1") == "1"
+
+# Local read mirror of the Supabase rules/required_docs tables (api/mirror.py).
+# While the mirror is younger than REFERENCE_MIRROR_MAX_AGE seconds those
+# endpoints read it instead of Supabase; a stale mirror falls back to Supabase
+# (and is still served if Supabase fails) and refreshes itself in the
+# background. `manage.py sync_reference_data` refreshes it on demand or on an
+# interval.
+REFERENCE_MIRROR_ENABLED = os.getenv("REFERENCE_MIRROR_ENABLED", "0") == "1"
+REFERENCE_MIRROR_MAX_AGE = int(os.getenv("REFERENCE_MIRROR_MAX_AGE", "900"))
+# Incremental syncs cannot see rows deleted upstream, so any sync becomes a full
+# re-copy once the last full sync is older than this many seconds (0 = never).
+REFERENCE_MIRROR_FULL_SYNC_INTERVAL = int(os.getenv("REFERENCE_MIRROR_FULL_SYNC_INTERVAL", "86400"))
+
+# Time limit (seconds) for the concurrent fetches behind
+# /api/application/<id>/bootstrap/; sections still running after it report a timeout
+BOOTSTRAP_SECTION_TIMEOUT = float(os.getenv("BOOTSTRAP_SECTION_TIMEOUT", "10"))
+
+# Micro-batching of OCR within a worker: same-sized uploads arriving within
+# OCR_BATCH_WINDOW_MS of the first (up to OCR_BATCH_MAX_SIZE) share one
+# admission slot and one detector pass; other sizes run in parallel in their
+# own slots. OCR_BATCH_MAX_SIZE=1 disables it.
+# Batching only helps with threaded workers (gunicorn --threads).
+OCR_BATCH_WINDOW_MS = float(os.getenv("OCR_BATCH_WINDOW_MS", "30"))
+OCR_BATCH_MAX_SIZE = int(os.getenv("OCR_BATCH_MAX_SIZE", "4"))
+
+# Store the extracted text and parser version with each uploaded trip, so
+# `manage.py reparse_documents` can re-parse it later. Needs the columns from
+# sql/001_trips_raw_text.sql on the Supabase trips table first.
+STORE_RAW_TEXT = os.getenv("STORE_RAW_TEXT", "0") == "1"
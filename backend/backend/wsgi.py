@@ -15,6 +15,11 @@ os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
 try:
     application = get_wsgi_application()
     print("✅ WSGI Loaded successfully", file=sys.stderr)
+
+    from django.conf import settings
+    if settings.OCR_WARMUP_ON_BOOT:
+        from api.ocr import start_warm_up
+        start_warm_up()
 except Exception as e:
     print(f"❌ WSGI failed: {e}", file=sys.stderr)
     raise
\ No newline at end of file
@@ -0,0 +1,5 @@
+-- Raw extracted document text and the parser version that produced the
+-- trip's derived fields, used by `manage.py reparse_documents`.
+-- Run in the Supabase SQL editor, then set STORE_RAW_TEXT=1.
+alter table trips add column if not exists raw_text text;
+alter table trips add column if not exists parser_version integer;